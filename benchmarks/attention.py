@@ -0,0 +1,97 @@
+import argparse
+import json
+import time
+import torch
+import torch.nn as nn
+from model.model import EarthquakeMagnitudeLSTM
+
+WINDOW_SIZES = [50, 100, 200, 500, 1000]
+
+
+def _time(fn, repeats, device):
+    fn()
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+        torch.cuda.reset_peak_memory_stats()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+    seconds = (time.perf_counter() - start) / repeats
+    peak_memory = torch.cuda.max_memory_allocated() if device.type == 'cuda' else None
+    return seconds, peak_memory
+
+
+def bench_attention(window_size, batch_size, embed_dim, need_weights, train, repeats, device):
+    attention = nn.MultiheadAttention(embed_dim, num_heads=4, dropout=0.2, batch_first=True).to(device)
+    attention.train(train)
+    x = torch.randn(batch_size, window_size, embed_dim, device=device, requires_grad=train)
+
+    def step():
+        if train:
+            out, _ = attention(x, x, x, need_weights=need_weights)
+            out.sum().backward()
+        else:
+            with torch.no_grad():
+                attention(x, x, x, need_weights=need_weights)
+
+    return _time(step, repeats, device)
+
+
+def bench_model(window_size, batch_size, input_size, hidden_size, return_attention, repeats, device):
+    model = EarthquakeMagnitudeLSTM(input_size, hidden_size=hidden_size).to(device).eval()
+    x = torch.randn(batch_size, window_size, input_size, device=device)
+
+    def step():
+        with torch.no_grad():
+            model(x, return_attention=return_attention)
+
+    return _time(step, repeats, device)
+
+
+def run(window_sizes, batch_size, hidden_size, input_size, repeats, device):
+    results = []
+    for window_size in window_sizes:
+        for mode in ('inference', 'training'):
+            for need_weights in (True, False):
+                seconds, peak_memory = bench_attention(
+                    window_size, batch_size, hidden_size * 2, need_weights, mode == 'training', repeats, device
+                )
+                results.append({
+                    'benchmark': 'attention', 'window_size': window_size, 'mode': mode,
+                    'need_weights': need_weights, 'seconds': seconds, 'peak_memory_bytes': peak_memory
+                })
+        for return_attention in (True, False):
+            seconds, peak_memory = bench_model(
+                window_size, batch_size, input_size, hidden_size, return_attention, repeats, device
+            )
+            results.append({
+                'benchmark': 'model', 'window_size': window_size, 'mode': 'inference',
+                'need_weights': return_attention, 'seconds': seconds, 'peak_memory_bytes': peak_memory
+            })
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare attention with and without materialized weights')
+    parser.add_argument('--window-sizes', type=int, nargs='+', default=WINDOW_SIZES)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--hidden-size', type=int, default=64)
+    parser.add_argument('--input-size', type=int, default=22)
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    results = run(args.window_sizes, args.batch_size, args.hidden_size, args.input_size, args.repeats, device)
+
+    print(f"{'benchmark':<10} {'window':>6} {'mode':<10} {'weights':<8} {'ms':>10} {'peak MB':>10}")
+    for r in results:
+        memory = f"{r['peak_memory_bytes'] / 2 ** 20:.1f}" if r['peak_memory_bytes'] is not None else '-'
+        print(f"{r['benchmark']:<10} {r['window_size']:>6} {r['mode']:<10} {str(r['need_weights']):<8} "
+              f"{r['seconds'] * 1000:>10.2f} {memory:>10}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
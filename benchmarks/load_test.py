@@ -0,0 +1,139 @@
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+ROOT = Path(__file__).parent.parent
+
+
+def _client(port, path, duration, results):
+    # One keep-alive connection issuing requests back to back
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    results.put((latencies, errors))
+
+
+def _wait_ready(port, path, timeout=180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', path)
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f'Server on port {port} did not become ready')
+
+
+def _children(pid):
+    children = []
+    for entry in Path('/proc').iterdir():
+        if entry.name.isdigit():
+            try:
+                if int((entry / 'stat').read_text().rsplit(')', 1)[1].split()[1]) == pid:
+                    children.append(int(entry.name))
+            except (OSError, IndexError, ValueError):
+                pass
+    return children
+
+
+def _memory_mb(pid):
+    # RSS counts shared pages in every process, PSS splits them between sharers;
+    # sum(PSS) well below sum(RSS) means the workers share memory
+    values = {}
+    try:
+        for line in (Path('/proc') / str(pid) / 'smaps_rollup').read_text().splitlines():
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                values[key.lower()] = int(rest.split()[0]) / 1024
+    except OSError:
+        pass
+    return values
+
+
+def run(workers, concurrency, duration, port, path):
+    env = {**os.environ, 'EQ_BIND': f'127.0.0.1:{port}', 'EQ_WORKERS': str(workers)}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'frontend/gunicorn.conf.py', 'frontend.app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_ready(port, path)
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=_client, args=(port, path, duration, results))
+            for _ in range(concurrency)
+        ]
+        for c in clients:
+            c.start()
+        outcomes = [results.get() for _ in clients]
+        for c in clients:
+            c.join()
+
+        memory = [_memory_mb(pid) for pid in _children(server.pid)]
+        latencies = np.concatenate([np.asarray(l) for l, _ in outcomes]) * 1000
+        return {
+            'workers': workers,
+            'requests': len(latencies),
+            'errors': sum(e for _, e in outcomes),
+            'throughput': len(latencies) / duration,
+            'latency_ms': {
+                'p50': float(np.percentile(latencies, 50)),
+                'p95': float(np.percentile(latencies, 95)),
+                'p99': float(np.percentile(latencies, 99))
+            } if len(latencies) else None,
+            'worker_rss_mb': sum(m.get('rss', 0) for m in memory),
+            'worker_pss_mb': sum(m.get('pss', 0) for m in memory)
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the preforking server at several worker counts')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent client connections')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per run')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--path', default='/predict_data')
+    parser.add_argument('--output', type=Path)
+    args = parser.parse_args()
+
+    reports = []
+    for n in args.workers:
+        r = run(n, args.concurrency, args.duration, args.port, args.path)
+        reports.append(r)
+        latency = r['latency_ms'] or {'p50': float('nan'), 'p95': float('nan'), 'p99': float('nan')}
+        print(f"{n:>2} workers  {r['throughput']:>8.1f} req/s  p50 {latency['p50']:.1f} p95 {latency['p95']:.1f} "
+              f"p99 {latency['p99']:.1f} ms  errors {r['errors']}  "
+              f"RSS {r['worker_rss_mb']:.0f} MB  PSS {r['worker_pss_mb']:.0f} MB")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=4)
@@ -0,0 +1,228 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+
+RESULTS_DIR = Path(__file__).parent / 'results'
+SCALES = [10_000, 100_000]
+STAGES = ['preprocess', 'make_seq', 'train_step', 'inference', 'predict_data']
+# Stages that do not depend on the catalog size run once
+UNSCALED_STAGES = {'train_step', 'inference', 'predict_data'}
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def _latency(timings_s):
+    timings_ms = np.asarray(timings_s) * 1000
+    return {
+        'p50': float(np.percentile(timings_ms, 50)),
+        'p95': float(np.percentile(timings_ms, 95)),
+        'p99': float(np.percentile(timings_ms, 99))
+    }
+
+
+def _params():
+    from utils.common import read_yaml
+    return read_yaml(Path(__file__).parent.parent / 'params.yaml')
+
+
+def bench_preprocess(scale, repeats):
+    from utils.synthetic import generate_catalog
+    from utils.preprocess import preprocess
+    df = generate_catalog(scale)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        preprocess(df.copy())
+        timings.append(time.perf_counter() - start)
+    return {'seconds': min(timings), 'throughput': len(df) / min(timings), 'unit': 'events/s'}
+
+
+def bench_make_seq(scale, repeats):
+    import torch
+    from pipeline.etl import make_seq
+    window_size = int(_params()['window_size'])
+    features, labels = torch.randn(scale, 22), torch.randn(scale)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        make_seq(features, labels, window_size)
+        timings.append(time.perf_counter() - start)
+    return {'seconds': min(timings), 'throughput': scale / min(timings), 'unit': 'events/s'}
+
+
+def bench_train_step(scale, repeats):
+    import torch
+    from model.factory import build_model
+    from utils.magloss import magnitude_aware_loss
+    params = _params()
+    batch_size, window_size = int(params['batch_size']), int(params['window_size'])
+    model = build_model(22, params)
+    optimizer = torch.optim.Adam(model.parameters(), lr=float(params['lr']))
+    x, y = torch.randn(batch_size, window_size, 22), torch.rand(batch_size) + 5.5
+    model.train()
+    timings = []
+    for i in range(repeats + 2):
+        start = time.perf_counter()
+        optimizer.zero_grad()
+        loss = magnitude_aware_loss(model(x).reshape(-1), y)
+        loss.backward()
+        optimizer.step()
+        if i >= 2:
+            timings.append(time.perf_counter() - start)
+    return {'seconds': float(np.median(timings)), 'throughput': batch_size / float(np.median(timings)),
+            'unit': 'windows/s', 'latency_ms': _latency(timings)}
+
+
+def bench_inference(scale, repeats):
+    import torch
+    from model.factory import build_model
+    params = _params()
+    window_size = int(params['window_size'])
+    model = build_model(22, params).eval()
+    single, batch = torch.randn(1, window_size, 22), torch.randn(256, window_size, 22)
+    with torch.no_grad():
+        model(single)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model(single)
+            timings.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        model(batch)
+        batch_seconds = time.perf_counter() - start
+    return {'seconds': float(np.median(timings)), 'throughput': len(batch) / batch_seconds,
+            'unit': 'windows/s', 'latency_ms': _latency(timings)}
+
+
+def bench_predict_data(scale, repeats):
+    # Full request path through the Flask test client; needs the app's dependencies and data
+    from frontend.app import app
+    client = app.test_client()
+    client.get('/predict_data')
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        response = client.get('/predict_data')
+        timings.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f'/predict_data returned {response.status_code}')
+    return {'seconds': float(np.median(timings)), 'throughput': 1 / float(np.median(timings)),
+            'unit': 'requests/s', 'latency_ms': _latency(timings)}
+
+
+BENCHMARKS = {
+    'preprocess': bench_preprocess,
+    'make_seq': bench_make_seq,
+    'train_step': bench_train_step,
+    'inference': bench_inference,
+    'predict_data': bench_predict_data
+}
+
+
+def _run_stage(stage, scale, repeats):
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    result = BENCHMARKS[stage](scale, repeats)
+    result['peak_rss_mb'] = _peak_rss_mb()
+    return result
+
+
+def run_stage(stage, scale, repeats):
+    # Each stage runs in a fresh process so peak RSS belongs to that stage alone
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(_run_stage, stage, scale, repeats).result()
+
+
+def compare(results, baseline, threshold):
+    # A stage regresses when its time (or p95 latency) grows by more than threshold
+    baseline = {(r['stage'], r['scale']): r for r in baseline['results'] if 'error' not in r}
+    regressions = []
+    for r in results:
+        old = baseline.get((r['stage'], r['scale']))
+        if old is None or 'error' in r:
+            continue
+        checks = [('seconds', r['seconds'], old['seconds'])]
+        if 'latency_ms' in r and 'latency_ms' in old:
+            checks.append(('latency_ms.p95', r['latency_ms']['p95'], old['latency_ms']['p95']))
+        for metric, new_value, old_value in checks:
+            if old_value > 0 and new_value > old_value * (1 + threshold):
+                regressions.append({'stage': r['stage'], 'scale': r['scale'], 'metric': metric,
+                                    'baseline': old_value, 'current': new_value,
+                                    'change': new_value / old_value - 1})
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=Path(__file__).parent,
+                                       text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark ETL, training and inference stages')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES,
+                        help='Synthetic catalog sizes, e.g. 10000 100000 1000000 10000000')
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--output', type=Path, help='Results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', type=Path, help='Baseline results file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed slowdown before failing (0.1 = 10%%)')
+    args = parser.parse_args()
+
+    results = []
+    for stage in args.stages:
+        scales = [None] if stage in UNSCALED_STAGES else args.scales
+        for scale in scales:
+            # Whole-catalog stages are slow; a few repeats are enough for them
+            repeats = args.repeats if stage in UNSCALED_STAGES else max(1, min(args.repeats, 3))
+            label = f'{stage} @ {scale}' if scale else stage
+            try:
+                result = {'stage': stage, 'scale': scale, **run_stage(stage, scale, repeats)}
+                latency = result.get('latency_ms')
+                print(f"{label:<28} {result['seconds'] * 1000:>10.2f} ms  {result['throughput']:>12.1f} {result['unit']:<11}"
+                      + (f"  p50 {latency['p50']:.2f} p95 {latency['p95']:.2f} p99 {latency['p99']:.2f} ms" if latency else '')
+                      + (f"  peak RSS {result['peak_rss_mb']:.0f} MB" if result['peak_rss_mb'] else ''))
+            except Exception as e:
+                result = {'stage': stage, 'scale': scale, 'error': f'{type(e).__name__}: {e}'}
+                print(f"{label:<28} failed: {result['error']}")
+            results.append(result)
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+    output = args.output or RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for r in regressions:
+            label = f"{r['stage']} @ {r['scale']}" if r['scale'] else r['stage']
+            print(f"REGRESSION {label} {r['metric']}: {r['baseline']:.4f} -> {r['current']:.4f} ({r['change']:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}")
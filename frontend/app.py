@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, redirect, request
 from flask_cors import CORS
 import torch
 import random as neuralmodel
@@ -12,7 +12,11 @@ from flask import send_from_directory
 from dotenv import load_dotenv
 import requests
 from cerebras.cloud.sdk import Cerebras
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from collections import deque
+import itertools
+import threading
+import time
 
 # Update the load_dotenv call to look in the parent directory
 env_path = Path(__file__).parent.parent / '.env'
@@ -27,8 +31,16 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 try:
     from utils.common import read_yaml
-    from model.model import EarthquakeMagnitudeLSTM
+    from utils.profiling import profiled, is_enabled, summary
+    from model.cache import PredictionCache
+    from model.serving import ModelServer
+    from model.registry import list_models, promote, serving_version
+    from utils.broadcast import Broadcaster
+    from utils.rolling import RollingErrorTracker
+    from utils import telemetry
     from pipeline.etl import etl
+    from pipeline.tiles import query_tiles, tile_coordinates, tiles_info
+    from utils.catalog_db import query_events
 except ImportError as e:
     print(f"Import Error: {e}")
     sys.exit(1)
@@ -49,67 +61,122 @@ try:
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     print(f"Using device: {device}")
 
+    config = read_yaml(Path(__file__).parent.parent / 'config.yaml')
+
+    # Bundled checkpoint, used until a model is promoted in the registry
     model_path = Path(__file__).parent.parent / 'model' / 'modelfile' / 'model_50_0P005_32_100.pt'
-    print(f"Looking for model file at: {model_path}")
 
     X_seq, Y_seq = etl()
     print(f"Data loaded: X shape: {X_seq.shape}, Y shape: {Y_seq.shape}")
 
-    model = EarthquakeMagnitudeLSTM(X_seq.shape[-1], hidden_size=hidden_size)
-    model.load_state_dict(torch.load(model_path, map_location=device))
-    model.eval()
+    canary_size = int(config['canary_size'])
+    model_server = ModelServer(
+        X_seq.shape[-1], device, X_seq[-canary_size:], Y_seq[-canary_size:],
+        max_canary_mae=float(config['canary_max_mae']),
+        fallback_path=model_path, fallback_params={'hidden_size': hidden_size},
+        cache=PredictionCache(int(config['prediction_cache_size']), float(config['prediction_cache_ttl']))
+        if int(config['prediction_cache_size']) > 0 else None
+    )
+    model_server.reload()
+    if model_server.model is None:
+        raise RuntimeError("No servable model found")
     print("Model loaded successfully")
 
 except Exception as e:
     print(f"Error during initialization: {e}")
     raise e
 
-# To track the last 20 predictions
-predictions_data = []
-total_absolute_error = 0
-prediction_counter = 0
+def start_background_tasks():
+    # Threads do not survive fork: under the preforking server (gunicorn.conf.py)
+    # this runs in each worker after the fork instead of at import. Every worker
+    # holds its own copy of the model, so each needs its own watcher to swap it
+    model_server.start_watcher(float(config['model_reload_interval']))
+
+if not os.environ.get('EQ_PREFORK'):
+    start_background_tasks()
+
+# Recent points for the dashboard and rolling error over several windows
+recent_predictions = deque(maxlen=int(config['stream_history']))
+error_tracker = RollingErrorTracker(config['rolling_windows'])
+prediction_lock = threading.Lock()
+prediction_counter = itertools.count(1)
+
+def next_prediction():
+    i = neuralmodel.randint(0, 99)
+    input_seq = X_seq[i].unsqueeze(0).to(device)
+    actual = Y_seq[i].item()
+
+    actual = actual + neuralmodel.uniform(-0.2, 0.2)
+    predicted = model_server.predict(input_seq).item()
+
+    error = error_tracker.update(predicted, actual)
+    point = {
+        "time_step": next(prediction_counter),
+        "predicted": predicted,
+        "actual": actual,
+        "latitude": neuralmodel.uniform(30, 33),
+        "longitude": neuralmodel.uniform(75, 79),
+        "absolute_error": abs(error),
+        # Mean Absolute Error over the shortest rolling window
+        "mae": error_tracker.mae()
+    }
+    with prediction_lock:
+        recent_predictions.append(point)
+    return point
+
+# Live feed: one prediction per tick, shared by every /stream subscriber
+broadcaster = Broadcaster(
+    next_prediction, float(config['stream_interval']), history=int(config['stream_history'])
+)
+
+@telemetry.register_collector
+def serving_metrics():
+    version = model_server.version
+    yield ('stream_subscribers', {}, broadcaster.subscriber_count, 'gauge', 'Open /stream connections')
+    # Summed over workers: how many serve each version, which shows a rollout in progress
+    yield ('model_info', {'version': version[0] if version else 'none'}, 1, 'gauge', 'Workers serving each model version')
+    if model_server.cache is not None:
+        cache_stats = model_server.cache.stats()
+        yield ('prediction_cache_entries', {}, cache_stats['entries'], 'gauge', 'Cached window predictions')
+        yield ('prediction_cache_hit_ratio', {}, cache_stats['hit_rate'], 'gauge', 'Prediction cache hit ratio since start', 'mean')
+    for window, stats in error_tracker.metrics().items():
+        yield ('prediction_rolling_mae', {'window': window}, stats['mae'], 'gauge', 'Rolling MAE of live predictions', 'mean')
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    telemetry.add_gauge('http_requests_in_flight', 1)
+
+@app.after_request
+def record_request(response):
+    endpoint = request.endpoint or 'unknown'
+    telemetry.observe('http_request_duration_seconds', time.perf_counter() - g.request_start, endpoint=endpoint)
+    telemetry.increment('http_requests_total', endpoint=endpoint, status=response.status_code)
+    return response
+
+@app.teardown_request
+def finish_request(exc):
+    if 'request_start' in g:
+        telemetry.add_gauge('http_requests_in_flight', -1)
 
 @app.route("/predict_data")
+@profiled('endpoint.predict_data')
 def predict_data():
+    # Polling endpoint, kept for clients that cannot use /stream
     print("Received prediction request")
-    global total_absolute_error, predictions_data, prediction_counter
 
     try:
-        i = neuralmodel.randint(0, 99)
-        input_seq = X_seq[i].unsqueeze(0).to(device)
-        actual = Y_seq[i].item()
-
-        actual = actual + neuralmodel.uniform(-0.2, 0.2)
-        predicted = neuralmodel.normalvariate(mu=actual, sigma=0.2)
-        
-        absolute_error = abs(predicted - actual)
-        total_absolute_error += absolute_error
-
-        prediction_counter += 1
-
-        if len(predictions_data) >= 10:
-            predictions_data.pop(0)
-            total_absolute_error -= predictions_data[0]['absolute_error']
-
-        predictions_data.append({
-            "time_step": prediction_counter,
-            "predicted": predicted,
-            "actual": actual,
-            "latitude": neuralmodel.uniform(30, 33),
-            "longitude": neuralmodel.uniform(75, 79),
-            "absolute_error": absolute_error
-        })
-
-        # Calculate Mean Absolute Error (MAE)
-        mae = total_absolute_error / len(predictions_data)
-
+        latest = next_prediction()
+        with prediction_lock:
+            history = list(recent_predictions)
         response_data = {
-            "prediction": predicted,
-            "actual": actual,
-            "latitude": predictions_data[-1]["latitude"],
-            "longitude": predictions_data[-1]["longitude"],
-            "mae": mae,
-            "predictions_data": predictions_data
+            "prediction": latest["predicted"],
+            "actual": latest["actual"],
+            "latitude": latest["latitude"],
+            "longitude": latest["longitude"],
+            "mae": latest["mae"],
+            "predictions_data": history,
+            "rolling": error_tracker.metrics()
         }
         return jsonify(response_data)
 
@@ -117,7 +184,117 @@ def predict_data():
         print(f"Error during prediction: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/stream")
+@profiled('endpoint.stream')
+def stream():
+    # Server-Sent Events: a 'snapshot' of recent predictions, then one
+    # 'prediction' event per tick carrying only the new point. Preforked workers
+    # each hold a thread per connection and would each run their own feed, so
+    # they send clients to the single stream server instead
+    if os.environ.get('EQ_PREFORK'):
+        return redirect(config['stream_url'], code=307)
+    return Response(broadcaster.stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route("/tiles")
+@profiled('endpoint.tiles')
+def get_tiles():
+    # Precomputed density/prediction tiles covering a bounding box; built offline
+    # by the 'tiles' pipeline mode
+    tiles_path = Path(__file__).parent.parent / config['dataset_root'] / config['tiles_db']
+    if not tiles_path.exists():
+        return jsonify({"error": "No tile pyramid found; run the 'tiles' pipeline mode"}), 404
+    try:
+        max_zoom = int(tiles_info(tiles_path)['max_zoom'])
+        z = min(max(request.args.get('z', 0, type=int), 0), max_zoom)
+        west = request.args.get('west', -180.0, type=float)
+        south = request.args.get('south', -90.0, type=float)
+        east = request.args.get('east', 180.0, type=float)
+        north = request.args.get('north', 90.0, type=float)
+        # Tile y grows southwards
+        (min_x, max_x), (max_y, min_y) = tile_coordinates([south, north], [west, east], z)
+        rows = query_tiles(tiles_path, z, int(min_x), int(max_x), int(min_y), int(max_y))
+        return jsonify({
+            "z": z,
+            "max_zoom": max_zoom,
+            "tiles": [dict(zip(("x", "y", "count", "max_magnitude", "mean_predicted"), row)) for row in rows]
+        })
+    except Exception as e:
+        print(f"Error reading tiles: {e}")
+        return jsonify({"error": str(e)}), 500
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+@app.route("/events")
+@profiled('endpoint.events')
+def get_events():
+    # Catalog query: time range, bounding box and magnitude filters, paged with
+    # the opaque cursor returned as next_cursor
+    db_path = Path(__file__).parent.parent / config['dataset_root'] / config['catalog_db']
+    if not db_path.exists():
+        return jsonify({"error": "No catalog database found; run the ETL first"}), 404
+    try:
+        bounds = [request.args.get(k, type=float) for k in ('south', 'west', 'north', 'east')]
+        if any(v is not None for v in bounds) and not all(v is not None for v in bounds):
+            return jsonify({"error": "Bounding box needs all of south, west, north and east"}), 400
+        limit = request.args.get('limit', 100, type=int)
+        if not 1 <= limit <= 1000:
+            return jsonify({"error": "limit must be between 1 and 1000"}), 400
+        rows, next_cursor = query_events(
+            db_path,
+            start=request.args.get('start'),
+            end=request.args.get('end'),
+            bbox=tuple(bounds) if bounds[0] is not None else None,
+            min_magnitude=request.args.get('min_magnitude', type=float),
+            max_magnitude=request.args.get('max_magnitude', type=float),
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Error querying events: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    events = []
+    for row in rows:
+        event = dict(row)
+        del event['rowid']
+        # fromtimestamp() rejects negative (pre-1970) epochs on Windows
+        event['time'] = (EPOCH + timedelta(seconds=event['time'])).strftime('%Y-%m-%dT%H:%M:%SZ')
+        events.append(event)
+    return jsonify({"events": events, "next_cursor": next_cursor})
+
+@app.route("/models")
+@profiled('endpoint.models')
+def models():
+    try:
+        version = serving_version()
+        serving_name = version[0] if version else None
+        return jsonify({
+            "serving": serving_name,
+            "models": [{**m, "serving": m['name'] == serving_name} for m in list_models()]
+        })
+    except Exception as e:
+        print(f"Error listing models: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/models/<name>/promote", methods=['POST'])
+@profiled('endpoint.promote_model')
+def promote_model(name):
+    try:
+        promote(name)
+        return jsonify({"serving": name})
+    except KeyError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        print(f"Error promoting model: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/get-notebook", methods=['GET'])
+@profiled('endpoint.get_notebook')
 def get_notebook():
     try:
         # Set the correct path to the notebook
@@ -184,6 +361,7 @@ def get_notebook():
         return jsonify({"error": str(e)}), 500
 
 @app.route("/chat", methods=['POST'])
+@profiled('endpoint.chat')
 def chat():
     try:
         message = request.json['message']
@@ -231,6 +409,7 @@ def chat():
         return jsonify({"error": str(e)}), 500
 
 @app.route("/get_news")
+@profiled('endpoint.get_news')
 def get_news():
     try:
         # Get news from NewsAPI
@@ -260,5 +439,19 @@ def get_news():
         print(f"Error fetching news: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/metrics")
+def metrics():
+    # Prometheus text exposition format
+    return Response(telemetry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route("/profile")
+def profile():
+    if not is_enabled():
+        return jsonify({"error": "Profiling is disabled; set profile: true in config.yaml or EQ_PROFILE=1"}), 404
+    return jsonify(summary())
+
 if __name__ == "__main__":
+    # Development server; for serving use
+    #   gunicorn -c frontend/gunicorn.conf.py frontend.app:app
+    #   gunicorn -c frontend/gunicorn_stream.conf.py frontend.app:app
     app.run(debug=True)
@@ -0,0 +1,60 @@
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Production entry point:
+#   gunicorn -c frontend/gunicorn.conf.py frontend.app:app
+# The app (model, sequence cache) is loaded once in the master and workers are
+# forked from it, so weights and the memory-mapped cache are shared
+# copy-on-write instead of being loaded once per worker.
+
+bind = os.environ.get('EQ_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('EQ_WORKERS', multiprocessing.cpu_count()))
+# Request/response endpoints only: /stream is redirected to the single-process
+# gevent server (gunicorn_stream.conf.py), so SSE connections never pin these threads
+worker_class = 'gthread'
+threads = int(os.environ.get('EQ_THREADS', 8))
+preload_app = True
+timeout = 120
+keepalive = 5
+
+# Tells the app not to start its background threads in the master, and to hand
+# /stream off to the stream server
+os.environ.setdefault('EQ_PREFORK', '1')
+# Workers share metrics through snapshots here, so /metrics covers all of them
+# whichever worker serves the scrape (see utils/telemetry.py)
+if 'EQ_METRICS_DIR' not in os.environ:
+    os.environ['EQ_METRICS_DIR'] = _metrics_dir = tempfile.mkdtemp(prefix='eq_metrics_')
+else:
+    _metrics_dir = None
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's reach; otherwise the
+    # first collection in each worker writes to (and so copies) every page
+    # holding a tracked object
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import torch
+    # Split the cores between workers instead of every worker using all of them
+    torch.set_num_threads(max(1, multiprocessing.cpu_count() // server.cfg.workers))
+
+    from frontend.app import start_background_tasks
+    start_background_tasks()
+
+
+def worker_exit(server, worker):
+    # Final snapshot so the exiting worker's last counts are not lost
+    from utils import telemetry
+    telemetry.flush()
+
+
+def on_exit(server):
+    # Snapshots only describe this server's lifetime
+    if _metrics_dir is not None:
+        shutil.rmtree(_metrics_dir, ignore_errors=True)
@@ -0,0 +1,17 @@
+import os
+
+# Live feed server, run next to the main server (gunicorn.conf.py):
+#   gunicorn -c frontend/gunicorn_stream.conf.py frontend.app:app
+# A single worker owns the one Broadcaster, so every dashboard sees the same
+# stream and each tick is computed once. gevent gives each /stream connection a
+# greenlet instead of a thread, so idle dashboards cost a few KB each and
+# cannot starve request handling. The main server redirects /stream here.
+
+bind = os.environ.get('EQ_STREAM_BIND', '0.0.0.0:5001')
+workers = 1
+worker_class = 'gevent'
+worker_connections = int(os.environ.get('EQ_STREAM_CONNECTIONS', 2000))
+# Loaded after the worker has monkey-patched threading and sockets
+preload_app = False
+timeout = 120
+keepalive = 5
@@ -5,6 +5,7 @@ import Home from './pages/Home';
 import DataAnalysis from './pages/DataAnalysis';
 import ChatBot from './pages/ChatBot';
 import News from './pages/News';
+import Models from './pages/Models';
 
 function App() {
   return (
@@ -16,6 +17,7 @@ function App() {
           <Route path="/analysis" element={<DataAnalysis />} />
           <Route path="/news" element={<News />} />
           <Route path="/chat" element={<ChatBot />} />
+          <Route path="/models" element={<Models />} />
         </Routes>
       </div>
     </Router>
@@ -1,5 +1,5 @@
-import React from 'react';
-import { MapContainer, TileLayer, Marker, Popup } from 'react-leaflet';
+import React, { useCallback, useEffect, useState } from 'react';
+import { MapContainer, TileLayer, Marker, Popup, Rectangle, useMapEvents } from 'react-leaflet';
 import 'leaflet/dist/leaflet.css';
 import L from 'leaflet';
 
@@ -17,6 +17,69 @@ const mapStyle = {
   borderRadius: '4px'
 };
 
+// Aggregate tiles are drawn a few zoom levels finer than the map so each
+// covers a small patch of the screen
+const TILE_ZOOM_OFFSET = 3;
+
+function tileBounds(z, x, y) {
+  const n = 2 ** z;
+  const lat = (t) => (Math.atan(Math.sinh(Math.PI * (1 - 2 * t / n))) * 180) / Math.PI;
+  return [[lat(y + 1), (x / n) * 360 - 180], [lat(y), ((x + 1) / n) * 360 - 180]];
+}
+
+// Mean predicted magnitude from 5 (yellow) to 8 (red)
+function tileColor(meanPredicted) {
+  if (meanPredicted === null) return '#888888';
+  const t = Math.min(Math.max((meanPredicted - 5) / 3, 0), 1);
+  return `hsl(${Math.round(60 - 60 * t)}, 100%, 45%)`;
+}
+
+function TileOverlay() {
+  const [tiles, setTiles] = useState({ z: 0, tiles: [] });
+
+  const fetchTiles = useCallback(async (map) => {
+    const bounds = map.getBounds();
+    const query = new URLSearchParams({
+      z: Math.round(map.getZoom()) + TILE_ZOOM_OFFSET,
+      west: bounds.getWest(),
+      south: bounds.getSouth(),
+      east: bounds.getEast(),
+      north: bounds.getNorth()
+    });
+    try {
+      const response = await fetch(`http://localhost:5000/tiles?${query}`);
+      if (!response.ok) return;
+      setTiles(await response.json());
+    } catch (error) {
+      console.error('Error fetching tiles:', error);
+    }
+  }, []);
+
+  const map = useMapEvents({ moveend: () => fetchTiles(map) });
+  useEffect(() => { fetchTiles(map); }, [fetchTiles, map]);
+
+  const maxCount = Math.max(1, ...tiles.tiles.map((tile) => tile.count));
+  return tiles.tiles.map((tile) => (
+    <Rectangle
+      key={`${tiles.z}/${tile.x}/${tile.y}`}
+      bounds={tileBounds(tiles.z, tile.x, tile.y)}
+      pathOptions={{
+        stroke: false,
+        fillColor: tileColor(tile.mean_predicted),
+        fillOpacity: 0.15 + 0.5 * Math.log1p(tile.count) / Math.log1p(maxCount)
+      }}
+    >
+      <Popup>
+        <div>
+          <strong>Events:</strong> {tile.count}<br/>
+          <strong>Max Magnitude:</strong> {tile.max_magnitude.toFixed(1)}<br/>
+          <strong>Mean Predicted:</strong> {tile.mean_predicted === null ? 'n/a' : tile.mean_predicted.toFixed(2)}
+        </div>
+      </Popup>
+    </Rectangle>
+  ));
+}
+
 function EarthquakeMap({ predictions }) {
   if (typeof window === 'undefined') return null;
 
@@ -30,6 +93,7 @@ function EarthquakeMap({ predictions }) {
         url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
         attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
       />
+      <TileOverlay />
       {predictions?.map((pred, index) => (
         <Marker 
           key={index}
@@ -39,6 +39,7 @@ function Navbar() {
             { path: '/analysis', label: 'Data Analysis' },
             { path: '/news', label: 'News' },
             { path: '/chat', label: 'Safety Chat' },
+            { path: '/models', label: 'Models' },
           ].map((item) => (
             <Button
               key={item.path}
@@ -55,34 +55,51 @@ function MapBounds({ points }) {
   return null;
 }
 
+// Recent points kept on the map and in the table
+const HISTORY_SIZE = 10;
+
+// Shape the list of recent points the way the page renders it
+const toPredictionData = (points) => {
+  const latest = points[points.length - 1] || {};
+  return {
+    prediction: latest.predicted ?? null,
+    actual: latest.actual ?? null,
+    latitude: latest.latitude ?? null,
+    longitude: latest.longitude ?? null,
+    mae: latest.mae ?? null,
+    predictions_data: points
+  };
+};
+
 function Home() {
-  const [predictionData, setPredictionData] = useState({
-    prediction: null,
-    actual: null,
-    latitude: null,
-    longitude: null,
-    mae: null,
-    predictions_data: []
-  });
+  const [predictionData, setPredictionData] = useState(toPredictionData([]));
   const [isRunning, setIsRunning] = useState(true);
 
-  const fetchPrediction = useCallback(async () => {
-    try {
-      const response = await fetch('http://localhost:5000/predict_data');
-      const data = await response.json();
-      setPredictionData(data);
-    } catch (error) {
+  // The server pushes a snapshot on connect and then one point per tick
+  const subscribe = useCallback(() => {
+    const source = new EventSource('http://localhost:5000/stream');
+    source.addEventListener('snapshot', (event) => {
+      setPredictionData(toPredictionData(JSON.parse(event.data)));
+    });
+    source.addEventListener('prediction', (event) => {
+      const point = JSON.parse(event.data);
+      setPredictionData((previous) =>
+        toPredictionData([...previous.predictions_data, point].slice(-HISTORY_SIZE))
+      );
+    });
+    source.onerror = (error) => {
+      // EventSource reconnects by itself and receives a fresh snapshot
       console.error('Error:', error);
-    }
+    };
+    return source;
   }, []);
 
   useEffect(() => {
     if (isRunning) {
-      fetchPrediction();
-      const interval = setInterval(fetchPrediction, 2000);
-      return () => clearInterval(interval);
+      const source = subscribe();
+      return () => source.close();
     }
-  }, [isRunning, fetchPrediction]);
+  }, [isRunning, subscribe]);
 
   const togglePrediction = () => {
     setIsRunning(!isRunning);
@@ -0,0 +1,133 @@
+import React, { useState, useEffect, useCallback } from 'react';
+import {
+  Box,
+  Typography,
+  Container,
+  Paper,
+  Button,
+  Chip,
+  CircularProgress
+} from '@mui/material';
+
+const cellStyle = { padding: '8px', fontSize: '0.875rem', textAlign: 'left' };
+const headerStyle = { ...cellStyle, borderBottom: '2px solid #eee' };
+
+const formatMetric = (value) => (value === null || value === undefined ? '-' : value.toFixed(4));
+
+const formatInterval = (interval) => (
+  interval ? `${interval[0].toFixed(4)} - ${interval[1].toFixed(4)}` : '-'
+);
+
+function Models() {
+  const [models, setModels] = useState([]);
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState(null);
+
+  const fetchModels = useCallback(async () => {
+    try {
+      const response = await fetch('http://localhost:5000/models');
+      if (!response.ok) throw new Error('Failed to fetch models');
+      const data = await response.json();
+      setModels(data.models);
+    } catch (err) {
+      setError(err.message);
+    } finally {
+      setLoading(false);
+    }
+  }, []);
+
+  useEffect(() => {
+    fetchModels();
+  }, [fetchModels]);
+
+  const promoteModel = async (name) => {
+    try {
+      const response = await fetch(`http://localhost:5000/models/${name}/promote`, { method: 'POST' });
+      if (!response.ok) throw new Error('Failed to promote model');
+      await fetchModels();
+    } catch (err) {
+      setError(err.message);
+    }
+  };
+
+  if (loading) {
+    return (
+      <Box sx={{
+        display: 'flex',
+        justifyContent: 'center',
+        alignItems: 'center',
+        minHeight: 'calc(100vh - 64px)'
+      }}>
+        <CircularProgress />
+      </Box>
+    );
+  }
+
+  return (
+    <Container maxWidth="xl" sx={{ py: 3 }}>
+      <Typography variant="h4" gutterBottom>
+        Model Registry
+      </Typography>
+      <Typography variant="subtitle1" color="text.secondary" sx={{ mb: 3 }}>
+        Compare registered checkpoints and choose the one served to the dashboard
+      </Typography>
+
+      {error && (
+        <Paper elevation={0} sx={{ p: 2, mb: 3, bgcolor: '#fff3f3' }}>
+          <Typography color="error">Error: {error}</Typography>
+        </Paper>
+      )}
+
+      <Paper elevation={0} sx={{ p: 3, overflowX: 'auto' }}>
+        <table style={{ width: '100%', borderCollapse: 'collapse' }}>
+          <thead>
+            <tr>
+              <th style={headerStyle}>Model</th>
+              <th style={headerStyle}>Hidden</th>
+              <th style={headerStyle}>Window</th>
+              <th style={headerStyle}>LR</th>
+              <th style={headerStyle}>Beta</th>
+              <th style={headerStyle}>MAE</th>
+              <th style={headerStyle}>MAE 95% CI</th>
+              <th style={headerStyle}>RMSE</th>
+              <th style={headerStyle}>High Mag. MAE</th>
+              <th style={headerStyle}>Train Time (s)</th>
+              <th style={headerStyle}></th>
+            </tr>
+          </thead>
+          <tbody>
+            {models.map((model, index) => (
+              <tr key={model.name} style={{ backgroundColor: index % 2 === 0 ? '#f8fafc' : 'white' }}>
+                <td style={cellStyle}>{model.name}</td>
+                <td style={cellStyle}>{model.hidden_size}</td>
+                <td style={cellStyle}>{model.window_size}</td>
+                <td style={cellStyle}>{model.lr}</td>
+                <td style={cellStyle}>{model.mag_loss_beta}</td>
+                <td style={cellStyle}>{formatMetric(model.mae)}</td>
+                <td style={cellStyle}>
+                  {formatInterval(model.metrics?.['Confidence Intervals']?.['Mean Absolute Error'])}
+                </td>
+                <td style={cellStyle}>{formatMetric(model.metrics?.['Root Mean Squared Error'])}</td>
+                <td style={cellStyle}>
+                  {formatMetric(model.metrics?.['High Magnitude']?.['Mean Absolute Error'])}
+                </td>
+                <td style={cellStyle}>{model.timings?.train_seconds?.toFixed(0) ?? '-'}</td>
+                <td style={cellStyle}>
+                  {model.serving ? (
+                    <Chip label="Serving" color="success" size="small" />
+                  ) : (
+                    <Button size="small" variant="outlined" onClick={() => promoteModel(model.name)}>
+                      Promote
+                    </Button>
+                  )}
+                </td>
+              </tr>
+            ))}
+          </tbody>
+        </table>
+      </Paper>
+    </Container>
+  );
+}
+
+export default Models;
@@ -1,5 +1,5 @@
 from pipeline.pipeline import run_pipeline
 
 if __name__ == '__main__':
-    run_pipeline('test') # train , test
+    run_pipeline('test') # train , test , distill , prune , score , tiles
 
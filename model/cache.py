@@ -0,0 +1,79 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from utils import telemetry
+
+
+class PredictionCache:
+    # Bounded LRU of per-window predictions with a time-to-live. Keys combine the
+    # model version with a blake2b digest of the scaled window's bytes, so a
+    # result can never be served for a different model even if an entry survives
+    # a swap; clear() is still called on swap to free the space.
+
+    def __init__(self, max_entries=4096, ttl=3600.0, name='prediction'):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.name = name
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def keys(version, features):
+        # One key per window along the first dimension
+        windows = features.detach().cpu().contiguous().numpy()
+        return [(version, w.shape, hashlib.blake2b(w, digest_size=16).digest()) for w in windows]
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        values, hits = [], 0
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] < now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    values.append(entry[0])
+                    hits += 1
+            self.hits += hits
+            self.misses += len(keys) - hits
+        if hits:
+            telemetry.increment('cache_requests_total', hits, cache=self.name, result='hit')
+        if len(keys) > hits:
+            telemetry.increment('cache_requests_total', len(keys) - hits, cache=self.name, result='miss')
+        return values
+
+    def put_many(self, keys, values):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._entries[key] = (value, expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
@@ -0,0 +1,19 @@
+from model.model import EarthquakeMagnitudeLSTM
+from model.streaming import StreamingEarthquakeLSTM
+from model.student import GRUStudent, TCNStudent
+
+STUDENT_TYPES = {'gru': GRUStudent, 'tcn': TCNStudent}
+
+
+def build_model(input_size, params):
+    model_type = params.get('model_type', 'bilstm')
+    hidden_size = int(params['hidden_size'])
+
+    if model_type == 'bilstm':
+        return EarthquakeMagnitudeLSTM(input_size, hidden_size=hidden_size, **(params.get('model_kwargs') or {}))
+    if model_type == 'streaming':
+        history = int(params.get('attention_history') or params['window_size'])
+        return StreamingEarthquakeLSTM(input_size, hidden_size=hidden_size, history=history)
+    if model_type in STUDENT_TYPES:
+        return STUDENT_TYPES[model_type](input_size, **(params.get('model_kwargs') or {}))
+    raise ValueError(f'Unknown model_type: {model_type}')
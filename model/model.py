@@ -2,13 +2,20 @@ import torch
 import torch.nn as nn
 
 class EarthquakeMagnitudeLSTM(nn.Module):
-    def __init__(self, input_size, hidden_size=128):
+    def __init__(self, input_size, hidden_size=128, lstm_hidden_sizes=None, mlp_sizes=(256, 64)):
         super(EarthquakeMagnitudeLSTM, self).__init__()
         
+        # Per-layer LSTM widths (three per stack) let structured pruning shrink
+        # individual layers. The last layer of each stack feeds an attention
+        # block and keeps hidden_size.
+        lstm_hidden_sizes = list(lstm_hidden_sizes or [hidden_size] * 6)
+        if lstm_hidden_sizes[2] != hidden_size or lstm_hidden_sizes[5] != hidden_size:
+            raise ValueError('The last LSTM layer of each stack must have hidden_size units')
+        
         self.first_lstm_layers = nn.ModuleList([
             nn.LSTM(
-                input_size if i == 0 else hidden_size * 2, 
-                hidden_size, 
+                input_size if i == 0 else lstm_hidden_sizes[i - 1] * 2, 
+                lstm_hidden_sizes[i], 
                 batch_first=True, 
                 bidirectional=True
             ) for i in range(3)
@@ -23,11 +30,11 @@ class EarthquakeMagnitudeLSTM(nn.Module):
         
         self.second_lstm_layers = nn.ModuleList([
             nn.LSTM(
-                hidden_size * 2, 
-                hidden_size, 
+                hidden_size * 2 if i == 0 else lstm_hidden_sizes[i + 2] * 2, 
+                lstm_hidden_sizes[i + 3], 
                 batch_first=True, 
                 bidirectional=True
-            ) for _ in range(3)
+            ) for i in range(3)
         ])
         
         self.second_attention = nn.MultiheadAttention(
@@ -38,29 +45,34 @@ class EarthquakeMagnitudeLSTM(nn.Module):
         )
         
         self.magnitude_predictor = nn.Sequential(
-            nn.Linear(hidden_size * 2, 256),
+            nn.Linear(hidden_size * 2, mlp_sizes[0]),
             nn.ReLU(),
             nn.Dropout(0.3),
-            nn.Linear(256, 64),
+            nn.Linear(mlp_sizes[0], mlp_sizes[1]),
             nn.ReLU(),
             nn.Dropout(0.2),
-            nn.Linear(64, 1)
+            nn.Linear(mlp_sizes[1], 1)
         )
         
-    def forward(self, x):
+    def forward(self, x, return_attention=False):
+        # need_weights=False lets nn.MultiheadAttention dispatch to the fused
+        # scaled_dot_product_attention kernels; the averaged weight matrices are
+        # only materialized when explicitly requested.
         for lstm_layer in self.first_lstm_layers:
             x, _ = lstm_layer(x)
         
-        x, _ = self.first_attention(x, x, x)
+        x, first_weights = self.first_attention(x, x, x, need_weights=return_attention)
         
         for lstm_layer in self.second_lstm_layers:
             x, _ = lstm_layer(x)
         
-        x, _ = self.second_attention(x, x, x)
+        x, second_weights = self.second_attention(x, x, x, need_weights=return_attention)
         
         pooled_features = torch.mean(x, dim=1)
         
         magnitude = self.magnitude_predictor(pooled_features)
         
+        if return_attention:
+            return magnitude, (first_weights, second_weights)
         return magnitude
     
\ No newline at end of file
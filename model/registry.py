@@ -0,0 +1,229 @@
+import argparse
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+MODEL_DIR = Path(__file__).parent / 'modelfile'
+REGISTRY_PATH = MODEL_DIR / 'registry.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    name TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    model_type TEXT,
+    n_epochs INTEGER,
+    lr REAL,
+    batch_size INTEGER,
+    window_size INTEGER,
+    hidden_size INTEGER,
+    mag_loss_beta REAL,
+    params TEXT NOT NULL,
+    data_hash TEXT,
+    mae REAL,
+    metrics TEXT,
+    timings TEXT
+);
+CREATE TABLE IF NOT EXISTS serving (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    name TEXT NOT NULL REFERENCES models (name),
+    promoted_at REAL NOT NULL
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_models_config ON models (model_type, window_size, hidden_size, lr, batch_size, n_epochs);
+CREATE INDEX IF NOT EXISTS idx_models_data_hash ON models (data_hash);
+CREATE INDEX IF NOT EXISTS idx_models_mae ON models (mae);
+"""
+
+CONFIG_KEYS = ['model_type', 'n_epochs', 'lr', 'batch_size', 'window_size', 'hidden_size', 'mag_loss_beta']
+
+
+def legacy_model_name(params):
+    lr_str = str(float(params['lr'])).replace('.', 'P')
+    return f"model_{int(params['n_epochs'])}_{lr_str}_{int(params['batch_size'])}_{int(params['window_size'])}"
+
+
+def _data_suffix(params):
+    # Models trained on a filtered catalog or extra features must not overwrite the global checkpoint
+    suffix = ''
+    if params.get('bbox'):
+        suffix += '_bbox' + '_'.join(str(float(v)).replace('.', 'P').replace('-', 'm') for v in params['bbox'])
+    elif params.get('region'):
+        suffix += f"_{params['region']}"
+    if params.get('start_date') or params.get('end_date'):
+        dates = [str(params.get(k) or '').replace('-', '') for k in ('start_date', 'end_date')]
+        suffix += f"_{dates[0]}-{dates[1]}"
+    if params.get('features'):
+        # Optional feature sets change the input width
+        suffix += '_f' + '-'.join(sorted(params['features']))
+    return suffix
+
+
+def model_name(params):
+    beta_str = str(float(params['mag_loss_beta'])).replace('.', 'P')
+    name = f"{legacy_model_name(params)}_{int(params['hidden_size'])}_{beta_str}{_data_suffix(params)}"
+    model_type = params.get('model_type', 'bilstm')
+    model_kwargs = params.get('model_kwargs') or {}
+    if model_type == 'bilstm' and model_kwargs:
+        # Pruned models: per-layer LSTM widths, then MLP widths
+        name += f"_pruned_{'-'.join(map(str, model_kwargs['lstm_hidden_sizes']))}_{'-'.join(map(str, model_kwargs['mlp_sizes']))}"
+    elif model_type == 'streaming':
+        name += f"_streaming{int(params.get('attention_history') or params['window_size'])}"
+    elif model_type != 'bilstm':
+        name += f'_{model_type}'
+        for key, value in sorted(model_kwargs.items()):
+            name += f"_{key}{str(value).replace('.', 'P')}"
+    return name
+
+
+def checkpoint_path(params):
+    # Checkpoints saved before hidden_size/mag_loss_beta were part of the name are
+    # still picked up when no checkpoint exists under the full name.
+    path = MODEL_DIR / f'{model_name(params)}.pt'
+    legacy_path = MODEL_DIR / f'{legacy_model_name(params)}.pt'
+    unfiltered = not _data_suffix(params)
+    if params.get('model_type', 'bilstm') == 'bilstm' and unfiltered and not path.exists() and legacy_path.exists():
+        return legacy_path
+    return path
+
+
+def data_hash(*tensors):
+    h = hashlib.blake2b(digest_size=16)
+    for tensor in tensors:
+        array = tensor.detach().cpu().contiguous().numpy()
+        h.update(str((array.dtype, array.shape)).encode())
+        h.update(memoryview(array).cast('B'))
+    return h.hexdigest()
+
+
+def connect(path=REGISTRY_PATH):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(SCHEMA)
+    # Registries created before model_type existed only hold bilstm models
+    columns = [row['name'] for row in conn.execute('PRAGMA table_info(models)')]
+    if 'model_type' not in columns:
+        conn.execute("ALTER TABLE models ADD COLUMN model_type TEXT DEFAULT 'bilstm'")
+    conn.executescript(INDEXES)
+    return conn
+
+
+def _to_dict(row):
+    if row is None:
+        return None
+    model = dict(row)
+    for key in ('params', 'metrics', 'timings'):
+        model[key] = json.loads(model[key]) if model[key] else None
+    # Paths inside MODEL_DIR are stored relative so the registry survives moving the repo
+    model['path'] = str(MODEL_DIR / model['path'])
+    return model
+
+
+def register(name, path, params, data_hash=None, timings=None, registry_path=REGISTRY_PATH):
+    config = [{'model_type': 'bilstm', **params}.get(key) for key in CONFIG_KEYS]
+    path = Path(path)
+    if path.parent.resolve() == MODEL_DIR.resolve():
+        path = path.name
+    with closing(connect(registry_path)) as conn, conn:
+        conn.execute(
+            f"""
+            INSERT INTO models (name, path, created_at, {', '.join(CONFIG_KEYS)}, params, data_hash, timings)
+            VALUES (?, ?, ?, {', '.join('?' for _ in CONFIG_KEYS)}, ?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET
+                path = excluded.path,
+                created_at = excluded.created_at,
+                params = excluded.params,
+                data_hash = excluded.data_hash,
+                timings = excluded.timings,
+                mae = NULL,
+                metrics = NULL
+            """,
+            [name, str(path), time.time(), *config, json.dumps(params), data_hash,
+             json.dumps(timings) if timings else None]
+        )
+
+
+def record_metrics(name, metrics, timings=None, registry_path=REGISTRY_PATH):
+    with closing(connect(registry_path)) as conn, conn:
+        row = conn.execute('SELECT timings FROM models WHERE name = ?', [name]).fetchone()
+        if row is None:
+            raise KeyError(f'Model {name} is not registered')
+        all_timings = {**json.loads(row['timings'] or '{}'), **(timings or {})}
+        conn.execute(
+            'UPDATE models SET mae = ?, metrics = ?, timings = ? WHERE name = ?',
+            [metrics.get('Mean Absolute Error'), json.dumps(metrics), json.dumps(all_timings), name]
+        )
+
+
+def get_model(name, registry_path=REGISTRY_PATH):
+    with closing(connect(registry_path)) as conn:
+        return _to_dict(conn.execute('SELECT * FROM models WHERE name = ?', [name]).fetchone())
+
+
+def list_models(registry_path=REGISTRY_PATH, **filters):
+    unknown = set(filters) - set(CONFIG_KEYS) - {'data_hash'}
+    if unknown:
+        raise ValueError(f'Cannot filter models by {sorted(unknown)}')
+    where = ' AND '.join(f'{key} = ?' for key in filters) or '1'
+    with closing(connect(registry_path)) as conn:
+        rows = conn.execute(
+            f'SELECT * FROM models WHERE {where} ORDER BY mae IS NULL, mae, created_at DESC',
+            list(filters.values())
+        ).fetchall()
+    return [_to_dict(row) for row in rows]
+
+
+def promote(name, registry_path=REGISTRY_PATH):
+    with closing(connect(registry_path)) as conn, conn:
+        if conn.execute('SELECT 1 FROM models WHERE name = ?', [name]).fetchone() is None:
+            raise KeyError(f'Model {name} is not registered')
+        conn.execute(
+            """
+            INSERT INTO serving (id, name, promoted_at) VALUES (1, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET name = excluded.name, promoted_at = excluded.promoted_at
+            """,
+            [name, time.time()]
+        )
+
+
+def serving_version(registry_path=REGISTRY_PATH):
+    # Cheap (name, promoted_at) probe for watchers; None when nothing was promoted
+    if not Path(registry_path).exists():
+        return None
+    with closing(connect(registry_path)) as conn:
+        row = conn.execute('SELECT name, promoted_at FROM serving WHERE id = 1').fetchone()
+    return tuple(row) if row else None
+
+
+def serving_model(registry_path=REGISTRY_PATH):
+    version = serving_version(registry_path)
+    return get_model(version[0], registry_path) if version else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Inspect and promote registered models')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list')
+    show_parser = subparsers.add_parser('show')
+    show_parser.add_argument('name')
+    promote_parser = subparsers.add_parser('promote')
+    promote_parser.add_argument('name')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        serving = serving_version()
+        for model in list_models():
+            marker = '*' if serving and serving[0] == model['name'] else ' '
+            mae = f"{model['mae']:.4f}" if model['mae'] is not None else '-'
+            print(f"{marker} {model['name']:<48} {model['model_type']:<10} MAE {mae:<8} hidden {model['hidden_size']:<4} beta {model['mag_loss_beta']}")
+    elif args.command == 'show':
+        print(json.dumps(get_model(args.name), indent=4))
+    elif args.command == 'promote':
+        promote(args.name)
+        print(f'{args.name} promoted to serving')
@@ -0,0 +1,133 @@
+import threading
+import time
+import torch
+from pathlib import Path
+from model.factory import build_model
+from model.registry import serving_model
+from utils import telemetry
+from utils.profiling import span
+
+
+class ModelServer:
+    # Holds the model used for prediction requests as a single (model, version)
+    # tuple. A background watcher loads, warms and validates a new checkpoint
+    # off the request path and then replaces the tuple in one assignment, so
+    # in-flight requests finish on the model they started with. An optional
+    # PredictionCache skips the forward pass for windows scored before.
+    def __init__(self, input_size, device, canary_features, canary_labels, max_canary_mae=None,
+                 fallback_path=None, fallback_params=None, cache=None):
+        self.input_size = input_size
+        self.device = device
+        self.canary_features = canary_features.to(device)
+        self.canary_labels = canary_labels.to(device)
+        self.max_canary_mae = max_canary_mae
+        self.fallback_path = fallback_path
+        self.fallback_params = fallback_params
+        self.cache = cache
+        self._current = (None, None)
+        # Versions that failed validation; a version includes the checkpoint's
+        # mtime, so rewriting the file gives it another chance
+        self._rejected = set()
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    @property
+    def model(self):
+        return self._current[0]
+
+    @property
+    def version(self):
+        return self._current[1]
+
+    def predict(self, features):
+        # Always a CPU float32 tensor, whether computed now or served from the cache
+        model, version = self._current
+        if self.cache is None:
+            return self._forward(model, features).cpu()
+
+        keys = self.cache.keys(version, features)
+        values = self.cache.get_many(keys)
+        missing = [i for i, value in enumerate(values) if value is None]
+        if missing:
+            computed = self._forward(model, features[missing]).cpu().tolist()
+            self.cache.put_many([keys[i] for i in missing], computed)
+            for i, value in zip(missing, computed):
+                values[i] = value
+        return torch.tensor(values, dtype=torch.float32)
+
+    def _forward(self, model, features):
+        start = time.perf_counter()
+        with torch.no_grad(), span('model.forward'):
+            predictions = model(features.to(self.device)).reshape(-1)
+        telemetry.observe('model_forward_seconds', time.perf_counter() - start)
+        telemetry.observe('model_batch_size', len(predictions))
+        return predictions
+
+    def _candidate(self):
+        # The promoted registry model wins; the checkpoint's mtime is part of the
+        # version so retraining under the same name is picked up too.
+        serving = serving_model()
+        if serving is not None:
+            path, params, name = Path(serving['path']), serving['params'], serving['name']
+        elif self.fallback_path is not None:
+            path, params, name = Path(self.fallback_path), self.fallback_params, Path(self.fallback_path).stem
+        else:
+            return None
+        if not path.exists():
+            return None
+        return (name, path.stat().st_mtime_ns), path, params
+
+    def _load(self, path, params):
+        model = build_model(self.input_size, params)
+        model.load_state_dict(torch.load(path, map_location=self.device, weights_only=True))
+        model.to(self.device)
+        model.eval()
+        return model
+
+    def _validate(self, model):
+        with torch.no_grad():
+            # First pass warms up allocations and kernels, second is the canary check
+            model(self.canary_features)
+            predictions = model(self.canary_features).reshape(-1)
+        if not torch.isfinite(predictions).all():
+            return False, float('nan')
+        mae = (predictions - self.canary_labels).abs().mean().item()
+        if self.max_canary_mae is not None and mae > self.max_canary_mae:
+            return False, mae
+        return True, mae
+
+    def reload(self):
+        with self._reload_lock:
+            candidate = self._candidate()
+            if candidate is None or candidate[0] == self.version or candidate[0] in self._rejected:
+                return False
+            version, path, params = candidate
+
+            model = self._load(path, params)
+            ok, mae = self._validate(model)
+            if not ok:
+                self._rejected.add(version)
+                print(f"Rejected model {version[0]}: canary MAE {mae:.4f}")
+                return False
+
+            self._current = (model, version)
+            if self.cache is not None:
+                self.cache.clear()
+            print(f"Serving model {version[0]} (canary MAE {mae:.4f})")
+            return True
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Error reloading model: {e}")
+
+    def start_watcher(self, interval=5.0):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), daemon=True)
+            self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
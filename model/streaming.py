@@ -0,0 +1,127 @@
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+
+class CausalSelfAttention(nn.Module):
+    # Self-attention where each step sees at most the last `history` steps
+    # (itself included). step() keeps keys/values of those steps in a ring
+    # buffer, so attending for one new event costs O(history), independent of
+    # how long the stream has run.
+    def __init__(self, embed_dim, num_heads, history, dropout=0.0):
+        super(CausalSelfAttention, self).__init__()
+        self.num_heads = num_heads
+        self.head_dim = embed_dim // num_heads
+        self.history = history
+        self.dropout = dropout
+        self.qkv_proj = nn.Linear(embed_dim, 3 * embed_dim)
+        self.out_proj = nn.Linear(embed_dim, embed_dim)
+
+    def forward(self, x):
+        batch_size, seq_len, embed_dim = x.shape
+        q, k, v = self.qkv_proj(x).view(batch_size, seq_len, 3, self.num_heads, self.head_dim).permute(2, 0, 3, 1, 4)
+
+        positions = torch.arange(seq_len, device=x.device)
+        offset = positions[:, None] - positions[None, :]
+        mask = (offset >= 0) & (offset < self.history)
+
+        out = F.scaled_dot_product_attention(
+            q, k, v, attn_mask=mask, dropout_p=self.dropout if self.training else 0.0
+        )
+        return self.out_proj(out.transpose(1, 2).reshape(batch_size, seq_len, embed_dim))
+
+    def step(self, x, cache):
+        batch_size, embed_dim = x.shape
+        q, k, v = self.qkv_proj(x).view(batch_size, 3, self.num_heads, self.head_dim).unbind(1)
+
+        if cache is None:
+            cache = {
+                'keys': x.new_zeros(batch_size, self.num_heads, self.history, self.head_dim),
+                'values': x.new_zeros(batch_size, self.num_heads, self.history, self.head_dim),
+                'count': 0
+            }
+        # No positional encoding is involved, so slot order in the ring does not matter
+        slot = cache['count'] % self.history
+        cache['keys'][:, :, slot] = k
+        cache['values'][:, :, slot] = v
+        cache['count'] += 1
+        filled = min(cache['count'], self.history)
+
+        out = F.scaled_dot_product_attention(
+            q.unsqueeze(2), cache['keys'][:, :, :filled], cache['values'][:, :, :filled]
+        )
+        return self.out_proj(out.reshape(batch_size, embed_dim)), cache
+
+
+class StreamingEarthquakeLSTM(nn.Module):
+    # Causal counterpart of EarthquakeMagnitudeLSTM: unidirectional LSTMs of the
+    # same width (2 * hidden_size) and attention limited to past events, predicting
+    # from the last step instead of pooling the whole window. forward() trains on
+    # windows; step() consumes one event at a time, carrying the LSTM states and
+    # attention caches between calls.
+    def __init__(self, input_size, hidden_size=128, history=100):
+        super(StreamingEarthquakeLSTM, self).__init__()
+        width = hidden_size * 2
+
+        self.first_lstm_layers = nn.ModuleList([
+            nn.LSTM(input_size if i == 0 else width, width, batch_first=True)
+            for i in range(3)
+        ])
+
+        self.first_attention = CausalSelfAttention(width, num_heads=4, history=history, dropout=0.2)
+
+        self.second_lstm_layers = nn.ModuleList([
+            nn.LSTM(width, width, batch_first=True)
+            for _ in range(3)
+        ])
+
+        self.second_attention = CausalSelfAttention(width, num_heads=4, history=history, dropout=0.2)
+
+        self.magnitude_predictor = nn.Sequential(
+            nn.Linear(width, 256),
+            nn.ReLU(),
+            nn.Dropout(0.3),
+            nn.Linear(256, 64),
+            nn.ReLU(),
+            nn.Dropout(0.2),
+            nn.Linear(64, 1)
+        )
+
+        self.reset_state()
+
+    def forward(self, x):
+        for lstm_layer in self.first_lstm_layers:
+            x, _ = lstm_layer(x)
+
+        x = self.first_attention(x)
+
+        for lstm_layer in self.second_lstm_layers:
+            x, _ = lstm_layer(x)
+
+        x = self.second_attention(x)
+
+        return self.magnitude_predictor(x[:, -1])
+
+    def reset_state(self):
+        self._lstm_states = [None] * (len(self.first_lstm_layers) + len(self.second_lstm_layers))
+        self._attention_caches = [None, None]
+
+    def _step_lstms(self, layers, x, offset):
+        x = x.unsqueeze(1)
+        for i, lstm_layer in enumerate(layers):
+            x, self._lstm_states[offset + i] = lstm_layer(x, self._lstm_states[offset + i])
+        return x.squeeze(1)
+
+    @torch.no_grad()
+    def step(self, event_features):
+        # event_features: (input_size,) for a single stream or (batch, input_size)
+        single = event_features.dim() == 1
+        x = event_features.unsqueeze(0) if single else event_features
+
+        x = self._step_lstms(self.first_lstm_layers, x, 0)
+        x, self._attention_caches[0] = self.first_attention.step(x, self._attention_caches[0])
+        x = self._step_lstms(self.second_lstm_layers, x, len(self.first_lstm_layers))
+        x, self._attention_caches[1] = self.second_attention.step(x, self._attention_caches[1])
+
+        magnitude = self.magnitude_predictor(x)
+        return magnitude.squeeze(0) if single else magnitude
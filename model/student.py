@@ -0,0 +1,34 @@
+import torch
+import torch.nn as nn
+
+
+class GRUStudent(nn.Module):
+    def __init__(self, input_size, hidden_size=32, num_layers=1):
+        super(GRUStudent, self).__init__()
+        self.gru = nn.GRU(input_size, hidden_size, num_layers=num_layers, batch_first=True)
+        self.magnitude_predictor = nn.Linear(hidden_size, 1)
+
+    def forward(self, x):
+        _, hidden = self.gru(x)
+        return self.magnitude_predictor(hidden[-1])
+
+
+class TCNStudent(nn.Module):
+    # Stack of causal dilated convolutions; dilation doubles per level so the
+    # receptive field covers (kernel_size - 1) * (2 ** levels - 1) + 1 events.
+    def __init__(self, input_size, channels=32, kernel_size=3, levels=4):
+        super(TCNStudent, self).__init__()
+        layers = []
+        for i in range(levels):
+            dilation = 2 ** i
+            layers += [
+                nn.ConstantPad1d(((kernel_size - 1) * dilation, 0), 0.0),
+                nn.Conv1d(input_size if i == 0 else channels, channels, kernel_size, dilation=dilation),
+                nn.ReLU()
+            ]
+        self.network = nn.Sequential(*layers)
+        self.magnitude_predictor = nn.Linear(channels, 1)
+
+    def forward(self, x):
+        features = self.network(x.transpose(1, 2))
+        return self.magnitude_predictor(torch.mean(features, dim=2))
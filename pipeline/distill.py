@@ -0,0 +1,179 @@
+import json
+import time
+import numpy as np
+import torch
+from pathlib import Path
+from model.factory import build_model
+from model.registry import MODEL_DIR, checkpoint_path, data_hash, model_name, promote, record_metrics, register
+from utils.common import read_yaml
+from utils.evaluation import METRICS, evaluate_slices
+from utils.loader import make_dataloader
+from utils.magloss import magnitude_aware_loss
+from utils.modelstats import count_parameters, measure_latency
+
+
+def predict(model, X, batch_size, device):
+    predictions = np.empty(len(X), dtype=np.float32)
+    offset = 0
+    model.eval()
+    with torch.no_grad():
+        for batch_features, _ in make_dataloader(X, torch.zeros(len(X)), batch_size, shuffle=False, device=device):
+            batch_predictions = model(batch_features.to(device)).reshape(-1)
+            predictions[offset:offset + len(batch_predictions)] = batch_predictions.cpu().numpy()
+            offset += len(batch_predictions)
+    return predictions
+
+
+def pareto_front(points):
+    # Points not beaten on both latency and MAE by any other point
+    front = []
+    for p in points:
+        dominated = any(
+            q['latency_ms'] <= p['latency_ms'] and q['mae'] <= p['mae']
+            and (q['latency_ms'] < p['latency_ms'] or q['mae'] < p['mae'])
+            for q in points
+        )
+        if not dominated:
+            front.append(p['name'])
+    return front
+
+
+def train_student(student, X_train, targets, epochs, lr, batch_size, alpha, device):
+    # targets[:, 0] are the true magnitudes, targets[:, 1] the teacher's predictions
+    student.to(device)
+    optimizer = torch.optim.Adam(student.parameters(), lr=lr)
+    dataloader = make_dataloader(X_train, targets, batch_size, shuffle=True, device=device)
+
+    student.train()
+    for epoch in range(epochs):
+        total_loss = 0.0
+        for batch_features, batch_targets in dataloader:
+            batch_features = batch_features.to(device, non_blocking=True)
+            batch_targets = batch_targets.to(device, non_blocking=True)
+
+            optimizer.zero_grad()
+            predictions = student(batch_features).reshape(-1)
+            loss = (alpha * magnitude_aware_loss(predictions, batch_targets[:, 0])
+                    + (1 - alpha) * magnitude_aware_loss(predictions, batch_targets[:, 1]))
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item()
+
+        print(f"  Epoch [{epoch+1}/{epochs}] Loss: {total_loss / len(dataloader):.4f}")
+
+
+def distill(X_seq, Y_seq, test_ratio=0.3):
+    params = Path(__file__).parent.parent / 'params.yaml'
+    params = read_yaml(params)
+
+    lr = float(params['lr'])
+    window_size = int(params['window_size'])
+    distill_epochs = int(params['distill_epochs'])
+    distill_batch_size = int(params['distill_batch_size'])
+    distill_alpha = float(params['distill_alpha'])
+    distill_tolerance = float(params['distill_tolerance'])
+    distill_promote = bool(params['distill_promote'])
+    students = params['distill_students']
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    input_size = X_seq.shape[-1]
+
+    test_size = int(len(X_seq) * test_ratio)
+    X_train, Y_train = X_seq[:-test_size], Y_seq[:-test_size]
+    X_test, Y_test = X_seq[-test_size:], Y_seq[-test_size:]
+    true_labels = Y_test.numpy()
+    all_slice = {'All': (np.zeros(len(true_labels), dtype=np.int64), ['All'])}
+
+    teacher_path = checkpoint_path(params)
+    teacher_name = teacher_path.stem
+    teacher = build_model(input_size, params)
+    teacher.load_state_dict(torch.load(teacher_path, map_location=device, weights_only=True))
+    teacher.to(device)
+
+    # Teacher outputs are computed once and reused by every student
+    soft_labels = torch.from_numpy(predict(teacher, X_train, distill_batch_size, device))
+    targets = torch.stack([Y_train, soft_labels], dim=1)
+
+    teacher_metrics = evaluate_slices(predict(teacher, X_test, distill_batch_size, device), true_labels, all_slice)['All']['All']
+    points = [{
+        'name': teacher_name,
+        'model_type': params.get('model_type', 'bilstm'),
+        'parameters': count_parameters(teacher),
+        'latency_ms': measure_latency(teacher, (1, window_size, input_size))['p50'],
+        'mae': teacher_metrics['Mean Absolute Error'],
+        'metrics': {k: teacher_metrics[k] for k in METRICS}
+    }]
+    print(f"Teacher {teacher_name}: MAE {points[0]['mae']:.4f}, latency {points[0]['latency_ms']:.2f} ms")
+
+    trained = {}
+    for spec in students:
+        spec = dict(spec)
+        model_type = spec.pop('model_type')
+        student_params = {**params, **spec, 'model_type': model_type, 'model_kwargs': spec,
+                          'input_size': input_size, 'teacher': teacher_name}
+        name = model_name(student_params)
+        print(f"Distilling {name}")
+
+        student = build_model(input_size, student_params)
+        # Start students at the mean magnitude instead of zero
+        with torch.no_grad():
+            student.magnitude_predictor.bias.fill_(Y_train.mean().item())
+        start = time.perf_counter()
+        train_student(student, X_train, targets, distill_epochs, lr, distill_batch_size, distill_alpha, device)
+        train_seconds = time.perf_counter() - start
+
+        metrics = evaluate_slices(predict(student, X_test, distill_batch_size, device), true_labels, all_slice)['All']['All']
+        latency = measure_latency(student, (1, window_size, input_size))
+        points.append({
+            'name': name,
+            'model_type': model_type,
+            'parameters': count_parameters(student),
+            'latency_ms': latency['p50'],
+            'mae': metrics['Mean Absolute Error'],
+            'metrics': {k: metrics[k] for k in METRICS}
+        })
+        trained[name] = (student, student_params, train_seconds, latency)
+        print(f"  MAE {metrics['Mean Absolute Error']:.4f}, latency {latency['p50']:.2f} ms, "
+              f"{count_parameters(student)} parameters")
+
+    front = pareto_front(points)
+
+    # Fastest student on the Pareto front that stays within tolerance of the teacher's MAE
+    candidates = [
+        p for p in points
+        if p['name'] in trained and p['name'] in front and p['mae'] <= points[0]['mae'] * (1 + distill_tolerance)
+    ]
+    chosen = min(candidates, key=lambda p: p['latency_ms']) if candidates else None
+
+    print("\nLatency / accuracy Pareto points:")
+    for p in sorted(points, key=lambda p: p['latency_ms']):
+        marker = '*' if chosen and p['name'] == chosen['name'] else ('+' if p['name'] in front else ' ')
+        print(f"{marker} {p['name']:<56} {p['latency_ms']:>8.2f} ms  MAE {p['mae']:.4f}  {p['parameters']:>9} params")
+
+    results_dir = Path(__file__).parent.parent / 'results' / teacher_name
+    results_dir.mkdir(parents=True, exist_ok=True)
+    with open(results_dir / 'distillation.json', 'w') as f:
+        json.dump({
+            'points': points,
+            'pareto_front': front,
+            'chosen': chosen['name'] if chosen else None
+        }, f, indent=4)
+
+    if chosen is None:
+        print(f"No student within {distill_tolerance:.0%} of the teacher's MAE")
+        return None
+
+    student, student_params, train_seconds, latency = trained[chosen['name']]
+    student_path = MODEL_DIR / f"{chosen['name']}.pt"
+    torch.save(student.state_dict(), student_path)
+    register(
+        chosen['name'], student_path, student_params,
+        data_hash=data_hash(X_seq, Y_seq),
+        timings={'train_seconds': train_seconds, 'latency_ms': latency}
+    )
+    record_metrics(chosen['name'], chosen['metrics'])
+    if distill_promote:
+        promote(chosen['name'])
+    print(f"Registered {chosen['name']}" + (" and promoted it to serving" if distill_promote else ""))
+
+    return chosen['name']
@@ -1,15 +1,79 @@
-import os
+import hashlib
+import json
 import torch
 import numpy as np
 import pandas as pd
 from pathlib import Path
 from utils.common import *
-from utils.preprocess import preprocess
+from utils.catalog import read_catalog
+from utils.catalog_db import sync_catalog_db
+from utils.features import compute_features, required_columns
+from utils.preprocess import CATALOG_COLUMNS, MIN_TIMESTAMP, preprocess
+from utils.profiling import span, profiled
 from sklearn.preprocessing import StandardScaler
 
-def pd_to_torch(root_path):
-    df_base = pd.read_csv(root_path / 'database.csv')
-    df_base = preprocess(df_base)
+META_COLUMNS = ['Year', 'Region_Cluster']
+# Raw catalog columns carried through to meta for traceability of predictions
+RAW_META_COLUMNS = ['ID', 'Timestamp']
+# Bump when preprocessing changes so stale sequence caches are not reused
+CACHE_VERSION = 3
+
+# Named bounding boxes: (min_lat, min_lon, max_lat, max_lon)
+REGIONS = {
+    'himalaya': (30.0, 75.0, 33.0, 79.0),
+    'japan': (30.0, 128.0, 46.0, 146.0),
+    'chile': (-45.0, -76.0, -17.0, -66.0),
+    'indonesia': (-11.0, 94.0, 6.0, 141.0),
+    'california': (32.0, -125.0, 42.0, -114.0)
+}
+
+
+def data_filters(params):
+    # Time window and bounding box from params.yaml, in read_catalog's terms.
+    # An explicit bbox takes precedence over a named region.
+    start = pd.Timestamp(params['start_date']) if params.get('start_date') else MIN_TIMESTAMP
+    end = pd.Timestamp(params['end_date']) if params.get('end_date') else None
+    bbox = params.get('bbox')
+    if bbox is None and params.get('region'):
+        if params['region'] not in REGIONS:
+            raise ValueError(f"Unknown region {params['region']!r}, expected one of {sorted(REGIONS)}")
+        bbox = REGIONS[params['region']]
+    if bbox is not None:
+        bbox = tuple(float(v) for v in bbox)
+        if len(bbox) != 4:
+            raise ValueError('bbox must be [min_lat, min_lon, max_lat, max_lon]')
+    return {'start': max(start, MIN_TIMESTAMP), 'end': end, 'bbox': bbox}
+
+
+def cache_key(catalog, window_size, filters, features=()):
+    key = {
+        'version': CACHE_VERSION,
+        'catalog': str(catalog),
+        'window_size': window_size,
+        'features': list(features),
+        'start': str(filters['start']),
+        'end': str(filters['end']),
+        'bbox': filters['bbox']
+    }
+    return hashlib.blake2b(json.dumps(key, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+def pd_to_torch(catalog_path, start=MIN_TIMESTAMP, end=None, bbox=None, min_events=1, features=()):
+    # Filters are applied while reading, before any feature derivation; only the
+    # columns the base and selected features need are read
+    columns = sorted(set(CATALOG_COLUMNS) | set(required_columns(features)) | {'ID'})
+    with span('etl.read_catalog'):
+        df_raw = read_catalog(catalog_path, columns=columns, start=start, end=end, bbox=bbox)
+    if len(df_raw) < min_events:
+        raise ValueError(f'Only {len(df_raw)} events match the filters, at least {min_events} are needed')
+    df_base = preprocess(df_raw)
+    # Same rows preprocess() keeps, so raw columns line up with df_base
+    df_raw = df_raw[df_raw['Timestamp'] >= MIN_TIMESTAMP].reset_index(drop=True)
+
+    if features:
+        with span('etl.features'):
+            df_raw['Region_Cluster'] = df_base['Region_Cluster'].to_numpy()
+            df_base = pd.concat([df_base, compute_features(df_raw, features)], axis=1)
 
     df_features = df_base.drop('Magnitude', axis=1)
     df_labels = df_base['Magnitude']
@@ -17,15 +81,21 @@ def pd_to_torch(root_path):
     np_features = df_features.to_numpy()
     np_labels = df_labels.to_numpy()
 
-    scaler = StandardScaler()
-    np_features_scaled = scaler.fit_transform(np_features)
+    with span('etl.scale'):
+        scaler = StandardScaler()
+        np_features_scaled = scaler.fit_transform(np_features)
 
     tensor_features = torch.tensor(np_features_scaled, dtype=torch.float32)
     tensor_labels = torch.tensor(np_labels, dtype=torch.float32)
 
-    return tensor_features, tensor_labels
+    # Unscaled per-event attributes used to slice evaluation metrics
+    meta = {col: df_base[col].to_numpy() for col in META_COLUMNS}
+    meta.update({col: df_raw[col].to_numpy() for col in RAW_META_COLUMNS})
+
+    return tensor_features, tensor_labels, meta
 
 
+@profiled('etl.make_seq')
 def make_seq(features, labels, window_size):
     X, y = [], []
     for i in range(len(features) - window_size + 1):
@@ -35,28 +105,49 @@ def make_seq(features, labels, window_size):
     return torch.stack(X), torch.stack(y)
 
 
-def etl():
+@profiled('etl')
+def etl(return_meta=False, filters=None):
     config = Path(__file__).parent.parent / 'config.yaml'
     params = Path(__file__).parent.parent / 'params.yaml'
     config = read_yaml(config)
     params = read_yaml(params)
     data_root_path = Path(__file__).parent.parent / config['dataset_root']
     window_size = int(params['window_size'])
-    if 'sequence_data.pt' in os.listdir(data_root_path):
-        loaded_data = torch.load(data_root_path / 'sequence_data.pt', weights_only=False)
+    catalog = config.get('catalog', 'database.csv')
+    filters = data_filters({**params, **(filters or {})})
+    features = list(params.get('features') or [])
+
+    # Indexed copy of the full catalog behind the /events query API
+    if config.get('catalog_db'):
+        with span('etl.catalog_db'):
+            sync_catalog_db(data_root_path / catalog, data_root_path / config['catalog_db'])
+
+    # One cache per catalog, window size, filter and feature set
+    cache_path = data_root_path / f'sequence_data_{cache_key(catalog, window_size, filters, features)}.pt'
+    if cache_path.exists():
+        with span('etl.load_cache'):
+            # Memory-mapped: pages are read on demand and shared between processes
+            # (e.g. forked server workers) through the page cache
+            loaded_data = torch.load(cache_path, weights_only=False, mmap=True)
         X_seq = loaded_data['X_seq']
         y_seq = loaded_data['y_seq']
-        return X_seq, y_seq
+        meta = loaded_data['meta']
+        return (X_seq, y_seq, meta) if return_meta else (X_seq, y_seq)
 
-    tensor_features, tensor_labels = pd_to_torch(data_root_path)
+    tensor_features, tensor_labels, meta = pd_to_torch(data_root_path / catalog, **filters, min_events=window_size, features=features)
 
     X_seq, y_seq = make_seq(tensor_features, tensor_labels, window_size=window_size)
+    # Align per-event attributes with the window targets
+    meta = {col: values[window_size-1:] for col, values in meta.items()}
 
-    torch.save({
-        'X_seq': X_seq,
-        'y_seq': y_seq
-    }, data_root_path / 'sequence_data.pt')
+    with span('etl.save_cache'):
+        torch.save({
+            'X_seq': X_seq,
+            'y_seq': y_seq,
+            'meta': meta,
+            'filters': filters
+        }, cache_path)
 
-    print("Data saved to sequence_data.pt")
+    print(f"Data saved to {cache_path.name}")
 
-    return X_seq, y_seq
+    return (X_seq, y_seq, meta) if return_meta else (X_seq, y_seq)
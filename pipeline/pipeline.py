@@ -1,14 +1,42 @@
 from pipeline.etl import etl
 from pipeline.train import train
 from pipeline.test import test
+from pipeline.distill import distill
+from pipeline.prune import prune
+from pipeline.score import score
+from pipeline.tiles import tiles
+from utils.profiling import is_enabled, print_summary, export_chrome_trace, torch_profile
 import torch
 from pathlib import Path
 
 def run_pipeline(mode):
-    X_seq, Y_seq = etl()
+    profile_dir = Path(__file__).parent.parent / 'results' / 'profile'
+    with torch_profile(profile_dir / f'torch_trace_{mode}.json'):
+        _run(mode)
+
+    if is_enabled():
+        print_summary()
+        export_chrome_trace(profile_dir / f'trace_{mode}.json')
+        print(f"Trace written to {profile_dir / f'trace_{mode}.json'}")
+
+
+def _run(mode):
+    X_seq, Y_seq, meta = etl(return_meta=True)
 
     if mode == 'train':        
         train(X_seq, Y_seq)
 
     elif mode == 'test':
-        test(X_seq, Y_seq)
+        test(X_seq, Y_seq, meta=meta)
+
+    elif mode == 'distill':
+        distill(X_seq, Y_seq)
+
+    elif mode == 'prune':
+        prune(X_seq, Y_seq)
+
+    elif mode == 'score':
+        score(X_seq, Y_seq, meta=meta)
+
+    elif mode == 'tiles':
+        tiles(X_seq, Y_seq, meta)
@@ -0,0 +1,195 @@
+import json
+import time
+import numpy as np
+import torch
+from pathlib import Path
+from model.factory import build_model
+from model.registry import MODEL_DIR, checkpoint_path, data_hash, model_name, promote, record_metrics, register
+from pipeline.distill import predict
+from utils.common import read_yaml
+from utils.evaluation import METRICS, evaluate_slices
+from utils.loader import make_dataloader
+from utils.magloss import magnitude_aware_loss
+from utils.modelstats import count_flops, count_parameters, measure_latency
+
+# LSTM layers whose outputs feed another LSTM (not an attention block) can be pruned;
+# indices run over first_lstm_layers followed by second_lstm_layers.
+PRUNABLE_LSTM_LAYERS = [0, 1, 3, 4]
+
+
+def _lstm_layers(model):
+    return list(model.first_lstm_layers) + list(model.second_lstm_layers)
+
+
+def _gate_rows(keep, hidden_size):
+    # Rows of the stacked input/forget/cell/output gate weights that belong to the kept units
+    return torch.cat([gate * hidden_size + keep for gate in range(4)])
+
+
+def _unit_importance(lstm, next_lstm, direction):
+    # L2 norm of everything a unit touches: its gate rows (input and recurrent)
+    # and the columns of the next layer that read its output.
+    suffix = '_reverse' if direction == 1 else ''
+    h = lstm.hidden_size
+    w_ih = getattr(lstm, f'weight_ih_l0{suffix}').detach()
+    w_hh = getattr(lstm, f'weight_hh_l0{suffix}').detach()
+    incoming = (w_ih.view(4, h, -1) ** 2).sum(dim=(0, 2)) + (w_hh.view(4, h, -1) ** 2).sum(dim=(0, 2))
+    outgoing = sum(
+        (getattr(next_lstm, f'weight_ih_l0{s}').detach()[:, direction * h:(direction + 1) * h] ** 2).sum(dim=0)
+        for s in ('', '_reverse')
+    )
+    return (incoming + outgoing).sqrt()
+
+
+def _slice_lstm(state, prefix, lstm, keep, in_keep):
+    # keep: kept units per direction; in_keep: kept input features (None keeps all)
+    for direction, suffix in enumerate(('', '_reverse')):
+        rows = _gate_rows(keep[direction], lstm.hidden_size)
+        cols = keep[direction]
+        w_ih = getattr(lstm, f'weight_ih_l0{suffix}').detach()[rows]
+        state[f'{prefix}.weight_ih_l0{suffix}'] = w_ih[:, in_keep] if in_keep is not None else w_ih
+        state[f'{prefix}.weight_hh_l0{suffix}'] = getattr(lstm, f'weight_hh_l0{suffix}').detach()[rows][:, cols]
+        state[f'{prefix}.bias_ih_l0{suffix}'] = getattr(lstm, f'bias_ih_l0{suffix}').detach()[rows]
+        state[f'{prefix}.bias_hh_l0{suffix}'] = getattr(lstm, f'bias_hh_l0{suffix}').detach()[rows]
+
+
+def prune_model(model, lstm_ratio, mlp_ratio):
+    # Returns the model_kwargs and state_dict of a dense, smaller EarthquakeMagnitudeLSTM
+    layers = _lstm_layers(model)
+    names = [f'first_lstm_layers.{i}' for i in range(3)] + [f'second_lstm_layers.{i}' for i in range(3)]
+    state = {k: v.detach().clone() for k, v in model.state_dict().items()}
+    hidden_size = layers[2].hidden_size
+
+    sizes = [lstm.hidden_size for lstm in layers]
+    in_keep = None
+    for i, lstm in enumerate(layers):
+        h = lstm.hidden_size
+        if i in PRUNABLE_LSTM_LAYERS:
+            n_keep = max(1, int(round(h * (1 - lstm_ratio))))
+            keep = [
+                torch.sort(torch.topk(_unit_importance(lstm, layers[i + 1], d), n_keep).indices).values
+                for d in (0, 1)
+            ]
+        else:
+            keep = [torch.arange(h), torch.arange(h)]
+        _slice_lstm(state, names[i], lstm, keep, in_keep)
+        sizes[i] = len(keep[0])
+        # The next layer reads [forward units, backward units]; attention blocks reset this
+        in_keep = torch.cat([keep[0], h + keep[1]]) if i in PRUNABLE_LSTM_LAYERS else None
+
+    # MLP head: rank hidden neurons by the norm of their incoming and outgoing weights
+    linears = [model.magnitude_predictor[0], model.magnitude_predictor[3], model.magnitude_predictor[6]]
+    mlp_keep = []
+    for j in range(2):
+        w_in, w_out = linears[j].weight.detach(), linears[j + 1].weight.detach()
+        importance = (w_in ** 2).sum(dim=1).sqrt() * (w_out ** 2).sum(dim=0).sqrt()
+        n_keep = max(1, int(round(len(importance) * (1 - mlp_ratio))))
+        mlp_keep.append(torch.sort(torch.topk(importance, n_keep).indices).values)
+
+    state['magnitude_predictor.0.weight'] = linears[0].weight.detach()[mlp_keep[0]]
+    state['magnitude_predictor.0.bias'] = linears[0].bias.detach()[mlp_keep[0]]
+    state['magnitude_predictor.3.weight'] = linears[1].weight.detach()[mlp_keep[1]][:, mlp_keep[0]]
+    state['magnitude_predictor.3.bias'] = linears[1].bias.detach()[mlp_keep[1]]
+    state['magnitude_predictor.6.weight'] = linears[2].weight.detach()[:, mlp_keep[1]]
+
+    model_kwargs = {'lstm_hidden_sizes': sizes, 'mlp_sizes': [len(k) for k in mlp_keep]}
+    assert sizes[2] == sizes[5] == hidden_size
+    return model_kwargs, state
+
+
+def fine_tune(model, X_train, Y_train, epochs, lr, batch_size, device):
+    model.to(device)
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    dataloader = make_dataloader(X_train, Y_train, batch_size, shuffle=True, device=device)
+
+    model.train()
+    for epoch in range(epochs):
+        total_loss = 0.0
+        for batch_features, batch_labels in dataloader:
+            batch_features = batch_features.to(device, non_blocking=True)
+            batch_labels = batch_labels.to(device, non_blocking=True)
+
+            optimizer.zero_grad()
+            loss = magnitude_aware_loss(model(batch_features).reshape(-1), batch_labels)
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1)
+            optimizer.step()
+            total_loss += loss.item()
+
+        print(f"  Epoch [{epoch+1}/{epochs}] Loss: {total_loss / len(dataloader):.4f}")
+
+
+def prune(X_seq, Y_seq, test_ratio=0.3):
+    params = Path(__file__).parent.parent / 'params.yaml'
+    params = read_yaml(params)
+
+    window_size = int(params['window_size'])
+    prune_lstm_ratio = float(params['prune_lstm_ratio'])
+    prune_mlp_ratio = float(params['prune_mlp_ratio'])
+    prune_epochs = int(params['prune_epochs'])
+    prune_lr = float(params['prune_lr'])
+    prune_batch_size = int(params['prune_batch_size'])
+    prune_promote = bool(params['prune_promote'])
+
+    if params.get('model_type', 'bilstm') != 'bilstm':
+        raise ValueError('Structured pruning supports the bilstm model only')
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    input_size = X_seq.shape[-1]
+    input_shape = (1, window_size, input_size)
+
+    test_size = int(len(X_seq) * test_ratio)
+    X_train, Y_train = X_seq[:-test_size], Y_seq[:-test_size]
+    X_test, Y_test = X_seq[-test_size:], Y_seq[-test_size:]
+    true_labels = Y_test.numpy()
+    all_slice = {'All': (np.zeros(len(true_labels), dtype=np.int64), ['All'])}
+
+    original_path = checkpoint_path(params)
+    original = build_model(input_size, params)
+    original.load_state_dict(torch.load(original_path, map_location='cpu', weights_only=True))
+
+    model_kwargs, state = prune_model(original, prune_lstm_ratio, prune_mlp_ratio)
+    pruned_params = {**params, 'model_kwargs': model_kwargs, 'input_size': input_size, 'pruned_from': original_path.stem}
+    pruned = build_model(input_size, pruned_params)
+    pruned.load_state_dict(state)
+    name = model_name(pruned_params)
+    print(f"Pruned {original_path.stem} to {model_kwargs}")
+
+    start = time.perf_counter()
+    fine_tune(pruned, X_train, Y_train, prune_epochs, prune_lr, prune_batch_size, device)
+    train_seconds = time.perf_counter() - start
+
+    report = {}
+    for label, model in (('original', original), ('pruned', pruned)):
+        model.to(device)
+        metrics = evaluate_slices(predict(model, X_test, prune_batch_size, device), true_labels, all_slice)['All']['All']
+        model.cpu()
+        report[label] = {
+            'name': original_path.stem if label == 'original' else name,
+            'parameters': count_parameters(model),
+            'flops': count_flops(model, input_shape),
+            'latency_ms': measure_latency(model, input_shape),
+            'metrics': {k: metrics[k] for k in METRICS}
+        }
+        print(f"{label:<9} {report[label]['parameters']:>9} params  {report[label]['flops'] / 1e6:>9.1f} MFLOPs  "
+              f"{report[label]['latency_ms']['p50']:>7.2f} ms  MAE {metrics['Mean Absolute Error']:.4f}")
+
+    results_dir = Path(__file__).parent.parent / 'results' / original_path.stem
+    results_dir.mkdir(parents=True, exist_ok=True)
+    with open(results_dir / 'pruning.json', 'w') as f:
+        json.dump({'model_kwargs': model_kwargs, **report}, f, indent=4)
+
+    pruned_path = MODEL_DIR / f'{name}.pt'
+    torch.save(pruned.state_dict(), pruned_path)
+    register(
+        name, pruned_path, pruned_params,
+        data_hash=data_hash(X_seq, Y_seq),
+        timings={'train_seconds': train_seconds, 'latency_ms': report['pruned']['latency_ms']}
+    )
+    record_metrics(name, {**report['pruned']['metrics'], 'Parameters': report['pruned']['parameters'],
+                          'FLOPs': report['pruned']['flops']})
+    if prune_promote:
+        promote(name)
+    print(f"Registered {name}" + (" and promoted it to serving" if prune_promote else ""))
+
+    return name
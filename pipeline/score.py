@@ -0,0 +1,122 @@
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+import torch
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from model.factory import build_model
+from model.registry import checkpoint_path, data_hash
+from utils.common import read_yaml
+from utils.profiling import span, profiled
+
+
+def _score_chunk(model, X, start, stop, batch_size, device):
+    predictions = np.empty(stop - start, dtype=np.float32)
+    with torch.no_grad():
+        for i in range(start, stop, batch_size):
+            j = min(i + batch_size, stop)
+            predictions[i - start:j - start] = model(X[i:j].to(device)).reshape(-1).cpu().numpy()
+    return predictions
+
+
+def _write_part(path, frame):
+    # Written under a temporary name and renamed, so a part file either exists
+    # complete or not at all and an interrupted run resumes at the first gap;
+    # the dot prefix hides a leftover temporary file from Parquet readers
+    tmp = path.with_name(f'.{path.name}.tmp')
+    frame.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+@profiled('score')
+def score(X_seq, Y_seq, meta=None):
+    # Checked before any chunk is scored, rather than failing on the first write
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError('Bulk scoring writes Parquet and needs pyarrow: pip install pyarrow') from e
+
+    params = Path(__file__).parent.parent / 'params.yaml'
+    params = read_yaml(params)
+
+    score_chunk_size = int(params['score_chunk_size'])
+    score_batch_size = int(params['score_batch_size'])
+    score_workers = int(params['score_workers'])
+
+    model_path = checkpoint_path(params)
+    name = model_path.stem
+    out_dir = Path(__file__).parent.parent / 'results' / name / 'scores'
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    model = build_model(X_seq.shape[-1], params)
+    model.load_state_dict(torch.load(model_path, map_location=device, weights_only=True))
+    model.to(device)
+    model.eval()
+
+    # Resuming is only valid for the same checkpoint, data and chunking. The
+    # leading underscore keeps Parquet readers from treating it as data
+    manifest = {
+        'model': name,
+        'checkpoint_mtime_ns': model_path.stat().st_mtime_ns,
+        'data_hash': data_hash(X_seq, Y_seq),
+        'n_windows': len(X_seq),
+        'chunk_size': score_chunk_size
+    }
+    manifest_path = out_dir / '_manifest.json'
+    if manifest_path.exists():
+        with open(manifest_path) as f:
+            previous = json.load(f)
+        if previous != manifest:
+            raise ValueError(f'{out_dir} holds scores from a different model, dataset or chunk size; '
+                             'remove it to rescore from scratch')
+    else:
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=4)
+
+    n_chunks = -(-len(X_seq) // score_chunk_size)
+    part_paths = [out_dir / f'part-{i:05d}.parquet' for i in range(n_chunks)]
+    pending = [i for i, path in enumerate(part_paths) if not path.exists()]
+    print(f"Scoring {len(X_seq)} windows with {name}: {n_chunks - len(pending)} of {n_chunks} chunks already done")
+
+    labels = Y_seq.numpy()
+    event_ids = meta.get('ID') if meta else None
+    event_times = meta.get('Timestamp') if meta else None
+
+    def run_chunk(i):
+        start = i * score_chunk_size
+        stop = min(start + score_chunk_size, len(X_seq))
+        chunk_start = time.perf_counter()
+        with span('score.forward', chunk=i):
+            predictions = _score_chunk(model, X_seq, start, stop, score_batch_size, device)
+
+        columns = {'window': np.arange(start, stop)}
+        if event_ids is not None:
+            columns['event_id'] = event_ids[start:stop]
+        if event_times is not None:
+            columns['event_time'] = event_times[start:stop]
+        columns.update({'prediction': predictions, 'actual': labels[start:stop]})
+        with span('score.write', chunk=i):
+            _write_part(part_paths[i], pd.DataFrame(columns))
+        seconds = time.perf_counter() - chunk_start
+        print(f"  chunk {i + 1}/{n_chunks}: {stop - start} windows in {seconds:.1f} s ({(stop - start) / seconds:,.0f}/s)")
+        return stop - start
+
+    # Inference ops release the GIL, so threads overlap forward passes and
+    # Parquet writes; torch's own thread pool is split between them
+    threads = torch.get_num_threads()
+    torch.set_num_threads(max(1, threads // max(1, score_workers)))
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=score_workers) as executor:
+            scored = sum(executor.map(run_chunk, pending))
+    finally:
+        torch.set_num_threads(threads)
+    seconds = time.perf_counter() - start
+
+    if scored:
+        print(f"Scored {scored} windows in {seconds:.1f} s ({scored / seconds:,.0f} windows/s)")
+    print(f"Predictions written to {out_dir}")
+    return out_dir
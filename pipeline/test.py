@@ -1,17 +1,21 @@
 import torch
 import numpy as np
-from torch.utils.data import DataLoader
-from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, mean_absolute_error, mean_squared_error
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
-from model.model import EarthquakeMagnitudeLSTM
+from model.factory import build_model
+from model.registry import checkpoint_path, data_hash, get_model, register, record_metrics
 import json
+import time
 from utils.common import read_yaml
-from utils.magloss import magnitude_aware_loss
+from utils.loader import make_dataloader
+from utils.evaluation import METRICS, evaluate_slices, magnitude_bands, categories, threshold
+from utils.bootstrap import confidence_intervals
+from utils.profiling import span, profiled, profile_iter
 
 
-def test(X_seq, Y_seq, test_ratio=0.3):
+@profiled('test')
+def test(X_seq, Y_seq, test_ratio=0.3, meta=None):
     params = Path(__file__).parent.parent / 'params.yaml'
     params = read_yaml(params)  
 
@@ -21,10 +25,20 @@ def test(X_seq, Y_seq, test_ratio=0.3):
     batch_size = int(params['batch_size'])
     window_size = int(params['window_size'])
     hidden_size = int(params['hidden_size'])
+    num_workers = int(params['num_workers'])
+    pin_memory = bool(params['pin_memory'])
+    persistent_workers = bool(params['persistent_workers'])
+    prefetch_factor = int(params['prefetch_factor'])
+    prefetch_batches = int(params['prefetch_batches'])
+    bootstrap_samples = int(params['bootstrap_samples'])
+    bootstrap_block_size = int(params['bootstrap_block_size'])
+    bootstrap_confidence = float(params['bootstrap_confidence'])
+    bootstrap_workers = int(params['bootstrap_workers'])
 
-    model_path = Path(__file__).parent.parent / 'model' / 'modelfile' / f'model_{n_epochs}_{lr_str}_{batch_size}_{window_size}.pt'
+    model_path = checkpoint_path(params)
+    name = model_path.stem
     print(model_path)
-    results_dir = Path(__file__).parent.parent / 'results' / f'model_{n_epochs}_{lr_str}_{batch_size}_{window_size}'
+    results_dir = Path(__file__).parent.parent / 'results' / name
     results_dir.mkdir(parents=True, exist_ok=True)
     
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
@@ -33,61 +47,87 @@ def test(X_seq, Y_seq, test_ratio=0.3):
     X_test = X_seq[-test_size:]
     Y_test = Y_seq[-test_size:]
     
-    model = EarthquakeMagnitudeLSTM(X_seq.shape[-1], hidden_size=hidden_size)
+    model = build_model(X_seq.shape[-1], params)
     model.load_state_dict(torch.load(model_path, weights_only=True))
     model.to(device)
     model.eval()
     
-    test_dataset = torch.utils.data.TensorDataset(X_test, Y_test)
-    test_dataloader = DataLoader(test_dataset, batch_size=batch_size, shuffle=False)
+    test_dataloader = make_dataloader(
+        X_test, Y_test, batch_size, shuffle=False, device=device,
+        num_workers=num_workers, pin_memory=pin_memory, persistent_workers=persistent_workers,
+        prefetch_factor=prefetch_factor, prefetch_batches=prefetch_batches
+    )
     
-    all_predictions = []
-    all_true_labels = []
+    test_start = time.perf_counter()
+    predictions = np.empty(len(X_test), dtype=np.float32)
+    true_labels = Y_test.numpy()
+    offset = 0
     
     with torch.no_grad():
-        for batch_features, batch_labels in test_dataloader:
-            batch_features, batch_labels = batch_features.to(device), batch_labels.to(device)
+        for batch_features, _ in profile_iter(test_dataloader, 'test.data'):
+            batch_features = batch_features.to(device, non_blocking=True)
             
-            predictions = model(batch_features).squeeze()
+            # reshape rather than squeeze so a final batch of one stays 1-D
+            with span('test.forward'):
+                batch_predictions = model(batch_features).reshape(-1)
             
-            all_predictions.extend(predictions.cpu().numpy())
-            all_true_labels.extend(batch_labels.cpu().numpy())
+            predictions[offset:offset + len(batch_predictions)] = batch_predictions.cpu().numpy()
+            offset += len(batch_predictions)
     
-    # Convert to numpy arrays
-    predictions = np.array(all_predictions)
-    true_labels = np.array(all_true_labels)
-    
-    # Compute metrics
-    metrics = {
-        'Mean Absolute Error': mean_absolute_error(true_labels, predictions),
-        'Mean Squared Error': mean_squared_error(true_labels, predictions),
-        'Root Mean Squared Error': np.sqrt(mean_squared_error(true_labels, predictions)),
-        'Magnitude-Aware Loss': magnitude_aware_loss(torch.tensor(predictions), torch.tensor(true_labels))
+    groupings = {
+        'All': (np.zeros(len(true_labels), dtype=np.int64), ['All']),
+        'High Magnitude': threshold(true_labels, 6.5),
+        'Magnitude Band': magnitude_bands(true_labels)
     }
+    if meta is not None:
+        groupings['Region'] = categories(meta['Region_Cluster'][-test_size:], prefix='Region ')
+        groupings['Year'] = categories(meta['Year'][-test_size:])
+
+    with span('test.metrics'):
+        slice_metrics = evaluate_slices(predictions, true_labels, groupings)
+
+    metrics = {k: slice_metrics['All']['All'][k] for k in METRICS}
+
+    # block_size 0 picks n^(1/3)
+    with span('test.bootstrap'):
+        intervals = confidence_intervals(
+            predictions, true_labels, block_size=bootstrap_block_size, n_samples=bootstrap_samples,
+            confidence=bootstrap_confidence, workers=bootstrap_workers
+        )
     
     print("Model Performance Metrics:")
     for metric, value in metrics.items():
-        print(f"{metric}: {value:.4f}")
+        low, high = intervals[metric]
+        print(f"{metric}: {value:.4f} ({bootstrap_confidence:.0%} CI {low:.4f} - {high:.4f})")
     
     with open(results_dir / 'model_metrics.json', 'w') as f:
-        json.dump({k: float(v) for k, v in metrics.items()}, f, indent=4)
+        json.dump({
+            **metrics,
+            'Confidence Level': bootstrap_confidence,
+            'Confidence Intervals': intervals
+        }, f, indent=4)
 
-    high_mag_rows = true_labels > 6.5
-    high_mag_predictions = predictions[high_mag_rows]
-    high_mag_true_labels = true_labels[high_mag_rows]
-
-    high_mag_metrics = {
-        'Mean Absolute Error': mean_absolute_error(high_mag_true_labels, high_mag_predictions),
-        'Mean Squared Error': mean_squared_error(high_mag_true_labels, high_mag_predictions),
-        'Root Mean Squared Error': np.sqrt(mean_squared_error(high_mag_true_labels, high_mag_predictions)),
-        'Magnitude-Aware Loss': magnitude_aware_loss(torch.tensor(high_mag_predictions), torch.tensor(high_mag_true_labels))
-    }
+    # A test split with no event above 6.5 has no such slice; report NaN rather than fail
+    high_mag_slice = slice_metrics['High Magnitude'].get('Magnitude > 6.5', {})
+    high_mag_metrics = {k: high_mag_slice.get(k, float('nan')) for k in METRICS}
 
     print("\n\nHigh Magnitude Model Performance Metrics:")
     for metric, value in high_mag_metrics.items():
         print(f"{metric}: {value:.4f}")
 
     with open(results_dir / 'high_mag_model_metrics.json', 'w') as f:
-        json.dump({k: float(v) for k, v in high_mag_metrics.items()}, f, indent=4)
+        json.dump(high_mag_metrics, f, indent=4)
+
+    with open(results_dir / 'slice_metrics.json', 'w') as f:
+        json.dump(slice_metrics, f, indent=4)
+
+    # Checkpoints trained before the registry existed get registered on first test
+    if get_model(name) is None:
+        register(name, model_path, {**params, 'input_size': X_seq.shape[-1]}, data_hash=data_hash(X_seq, Y_seq))
+    record_metrics(
+        name,
+        {**metrics, 'Confidence Intervals': intervals, 'High Magnitude': high_mag_metrics},
+        timings={'test_seconds': time.perf_counter() - test_start}
+    )
 
     return metrics
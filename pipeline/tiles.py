@@ -0,0 +1,166 @@
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+from contextlib import closing
+from pathlib import Path
+from pipeline.etl import data_filters
+from pipeline.score import score
+from utils.catalog import read_catalog
+from utils.common import read_yaml
+from utils.profiling import span, profiled
+
+MAX_LATITUDE = 85.05112878
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tiles (
+    z INTEGER NOT NULL,
+    x INTEGER NOT NULL,
+    y INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    max_magnitude REAL NOT NULL,
+    predicted_count INTEGER NOT NULL,
+    mean_predicted REAL,
+    PRIMARY KEY (z, x, y)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tiles_info (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def tile_coordinates(lat, lon, zoom):
+    # Web Mercator XYZ tile indices (the scheme Leaflet and OSM tiles use)
+    n = 1 << zoom
+    lat = np.radians(np.clip(lat, -MAX_LATITUDE, MAX_LATITUDE))
+    x = np.floor((np.asarray(lon) + 180.0) / 360.0 * n).astype(np.int64)
+    y = np.floor((1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0 * n).astype(np.int64)
+    return np.clip(x, 0, n - 1), np.clip(y, 0, n - 1)
+
+
+def _spread_bits(v):
+    # Insert a zero between each of the low 32 bits
+    v = v & 0xFFFFFFFF
+    v = (v | (v << 16)) & 0x0000FFFF0000FFFF
+    v = (v | (v << 8)) & 0x00FF00FF00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v << 2)) & 0x3333333333333333
+    v = (v | (v << 1)) & 0x5555555555555555
+    return v
+
+
+def quadkeys(x, y):
+    # Interleaved (Morton) tile index. A parent's quadkey is its child's shifted
+    # right by two bits, so sorting once at the deepest zoom sorts every zoom.
+    return _spread_bits(y) << 1 | _spread_bits(x)
+
+
+def aggregate(lat, lon, magnitude, predicted, max_zoom):
+    # One vectorized pass per zoom over events sorted by quadkey: tile boundaries
+    # are where the shifted key changes, and reduceat sums/maxes each run.
+    x, y = tile_coordinates(lat, lon, max_zoom)
+    keys = quadkeys(x, y)
+    order = np.argsort(keys, kind='stable')
+    keys, x, y = keys[order], x[order], y[order]
+    magnitude = np.asarray(magnitude, dtype=np.float64)[order]
+    predicted = np.asarray(predicted, dtype=np.float64)[order]
+    has_prediction = ~np.isnan(predicted)
+    predicted = np.where(has_prediction, predicted, 0.0)
+
+    levels = []
+    for z in range(max_zoom + 1):
+        shift = max_zoom - z
+        level_keys = keys >> (2 * shift)
+        starts = np.flatnonzero(np.r_[True, level_keys[1:] != level_keys[:-1]])
+        counts = np.diff(np.r_[starts, len(keys)])
+        predicted_counts = np.add.reduceat(has_prediction, starts)
+        predicted_sums = np.add.reduceat(predicted, starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_predicted = np.where(predicted_counts > 0, predicted_sums / predicted_counts, np.nan)
+        levels.append(pd.DataFrame({
+            'z': z,
+            'x': x[starts] >> shift,
+            'y': y[starts] >> shift,
+            'count': counts,
+            'max_magnitude': np.maximum.reduceat(magnitude, starts),
+            'predicted_count': predicted_counts,
+            'mean_predicted': mean_predicted
+        }))
+    return pd.concat(levels, ignore_index=True)
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def write_tiles(path, tiles, info):
+    # Built into a new file and swapped in, so readers never see a partial pyramid
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.unlink(missing_ok=True)
+    with closing(connect(tmp)) as conn, conn:
+        conn.executemany(
+            'INSERT INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?)',
+            tiles.astype(object).where(tiles.notna(), None).itertuples(index=False, name=None)
+        )
+        conn.executemany('INSERT INTO tiles_info VALUES (?, ?)', [(k, str(v)) for k, v in info.items()])
+    tmp.replace(path)
+
+
+def query_tiles(path, z, min_x, max_x, min_y, max_y):
+    # Range scan on the (z, x, y) primary key
+    with closing(sqlite3.connect(f'file:{path}?mode=ro', uri=True)) as conn:
+        rows = conn.execute(
+            """
+            SELECT x, y, count, max_magnitude, mean_predicted FROM tiles
+            WHERE z = ? AND x BETWEEN ? AND ? AND y BETWEEN ? AND ?
+            """,
+            (z, min_x, max_x, min_y, max_y)
+        ).fetchall()
+    return rows
+
+
+def tiles_info(path):
+    with closing(sqlite3.connect(f'file:{path}?mode=ro', uri=True)) as conn:
+        return dict(conn.execute('SELECT key, value FROM tiles_info').fetchall())
+
+
+@profiled('tiles')
+def tiles(X_seq, Y_seq, meta):
+    config = Path(__file__).parent.parent / 'config.yaml'
+    params = Path(__file__).parent.parent / 'params.yaml'
+    config = read_yaml(config)
+    params = read_yaml(params)
+    data_root_path = Path(__file__).parent.parent / config['dataset_root']
+    tiles_max_zoom = int(config['tiles_max_zoom'])
+    tiles_path = data_root_path / config['tiles_db']
+
+    # Predictions come from the bulk scoring output; this is a no-op when it is complete
+    scores_dir = score(X_seq, Y_seq, meta=meta)
+
+    start = time.perf_counter()
+    with span('tiles.read'):
+        predictions = pd.read_parquet(scores_dir, columns=['event_id', 'prediction'])
+        catalog = read_catalog(
+            data_root_path / config.get('catalog', 'database.csv'),
+            columns=['ID', 'Latitude', 'Longitude', 'Magnitude'], **data_filters(params)
+        )
+    predicted = catalog['ID'].map(predictions.set_index('event_id')['prediction']).to_numpy(dtype=np.float64)
+
+    with span('tiles.aggregate'):
+        pyramid = aggregate(catalog['Latitude'].to_numpy(), catalog['Longitude'].to_numpy(),
+                            catalog['Magnitude'].to_numpy(), predicted, tiles_max_zoom)
+    with span('tiles.write'):
+        write_tiles(tiles_path, pyramid, {
+            'model': scores_dir.parent.name,
+            'max_zoom': tiles_max_zoom,
+            'events': len(catalog),
+            'built_at': time.time()
+        })
+    print(f"Wrote {len(pyramid)} tiles for {len(catalog)} events (zoom 0-{tiles_max_zoom}) to {tiles_path} "
+          f"in {time.perf_counter() - start:.1f} s")
+    return tiles_path
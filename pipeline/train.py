@@ -1,11 +1,14 @@
 import torch
 import torch.nn as nn
-from torch.utils.data import DataLoader
-from model.model import EarthquakeMagnitudeLSTM
+from model.factory import build_model
+from model.registry import MODEL_DIR, model_name, data_hash, register
 from utils.common import read_yaml
 from pathlib import Path
 import numpy as np
+import time
 from utils.magloss import magnitude_aware_loss
+from utils.loader import make_dataloader
+from utils.profiling import span, profiled, profile_iter
 
 params = Path(__file__).parent.parent / 'params.yaml'
 params = read_yaml(params)
@@ -16,13 +19,20 @@ lr_str = str(lr).replace('.', 'P')
 batch_size = int(params['batch_size'])
 window_size = int(params['window_size'])
 hidden_size = int(params['hidden_size'])
-model_path = Path(__file__).parent.parent / 'model' / 'modelfile' / f'model_{n_epochs}_{lr_str}_{batch_size}_{window_size}.pt'
+num_workers = int(params['num_workers'])
+pin_memory = bool(params['pin_memory'])
+persistent_workers = bool(params['persistent_workers'])
+prefetch_factor = int(params['prefetch_factor'])
+prefetch_batches = int(params['prefetch_batches'])
+name = model_name(params)
+model_path = MODEL_DIR / f'{name}.pt'
 
 
+@profiled('train')
 def train(X_seq, Y_seq):
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     # X_seq.shape: [21904, 50, 22]
-    model = EarthquakeMagnitudeLSTM(X_seq.shape[-1], hidden_size=hidden_size)
+    model = build_model(X_seq.shape[-1], params)
     model.to(device)
     # criterion = nn.MSELoss()
     criterion = magnitude_aware_loss
@@ -32,29 +42,37 @@ def train(X_seq, Y_seq):
     
     torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1)
 
-    dataset = torch.utils.data.TensorDataset(X_seq, Y_seq)
-    dataloader = DataLoader(dataset, batch_size=batch_size, shuffle=True)
+    dataloader = make_dataloader(
+        X_seq, Y_seq, batch_size, shuffle=True, device=device,
+        num_workers=num_workers, pin_memory=pin_memory, persistent_workers=persistent_workers,
+        prefetch_factor=prefetch_factor, prefetch_batches=prefetch_batches
+    )
 
     print("Data Statistics:")
     print(f"X_seq mean: {X_seq.mean()}, std: {X_seq.std()}")
     print(f"Y_seq mean: {Y_seq.mean()}, std: {Y_seq.std()}")
     
+    train_start = time.perf_counter()
     model.train()
     for epoch in range(n_epochs):
         total_loss = 0.0
         all_predictions = []
         all_true_labels = []
         
-        for batch_features, batch_labels in dataloader:
-            batch_features, batch_labels = batch_features.to(device), batch_labels.to(device)
+        for batch_features, batch_labels in profile_iter(dataloader, 'train.data'):
+            batch_features = batch_features.to(device, non_blocking=True)
+            batch_labels = batch_labels.to(device, non_blocking=True)
             
             optimizer.zero_grad()
-            predictions = model(batch_features)
+            with span('train.forward'):
+                predictions = model(batch_features)
+                
+                loss = criterion(predictions.squeeze(), batch_labels)
+            with span('train.backward'):
+                loss.backward()
             
-            loss = criterion(predictions.squeeze(), batch_labels)
-            loss.backward()
-            
-            optimizer.step()
+            with span('train.optimizer_step'):
+                optimizer.step()
             
             total_loss += loss.item()
             
@@ -74,7 +92,16 @@ def train(X_seq, Y_seq):
         print(f"  Current LR: {optimizer.param_groups[0]['lr']}")
 
         
-        torch.save(model.state_dict(), model_path)
+        with span('train.save'):
+            torch.save(model.state_dict(), model_path)
+
+    train_seconds = time.perf_counter() - train_start
+    register(
+        name, model_path, {**params, 'input_size': X_seq.shape[-1]},
+        data_hash=data_hash(X_seq, Y_seq),
+        timings={'train_seconds': train_seconds, 'epoch_seconds': train_seconds / n_epochs}
+    )
+    print(f"Registered {name}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,56 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from utils.evaluation import METRICS, sample_statistics
+from utils.magloss import mag_loss_beta
+
+
+def default_block_size(n):
+    return max(1, int(round(n ** (1 / 3))))
+
+
+def _replicate_means(block_sums, n_starts, n_blocks, block_size, n_samples, seed):
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, n_starts, size=(n_samples, n_blocks))
+    return block_sums[starts].sum(axis=1) / (n_blocks * block_size)
+
+
+def block_bootstrap_means(stats, block_size, n_samples=1000, seed=42, workers=4):
+    # Moving-block bootstrap: each replicate concatenates ceil(n / block_size) blocks
+    # of consecutive samples drawn with replacement, which keeps the temporal
+    # correlation inside a block. Block sums come from one prefix sum, so a
+    # replicate costs one gather over its block starts.
+    n = len(stats)
+    block_size = min(block_size, n)
+    n_blocks = -(-n // block_size)
+    n_starts = n - block_size + 1
+
+    prefix = np.concatenate([np.zeros((1, stats.shape[1])), np.cumsum(stats, axis=0)])
+    block_sums = prefix[block_size:] - prefix[:n_starts]
+
+    workers = max(1, min(workers, n_samples))
+    sizes = [len(chunk) for chunk in np.array_split(np.arange(n_samples), workers)]
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_replicate_means, block_sums, n_starts, n_blocks, block_size, size, worker_seed)
+            for size, worker_seed in zip(sizes, seeds)
+        ]
+        return np.concatenate([future.result() for future in futures])
+
+
+def confidence_intervals(predictions, labels, block_size=None, n_samples=1000, confidence=0.95,
+                         seed=42, workers=4, beta=mag_loss_beta):
+    stats = sample_statistics(predictions, labels, beta)
+    if not block_size:
+        block_size = default_block_size(len(stats))
+
+    means = block_bootstrap_means(stats, block_size, n_samples=n_samples, seed=seed, workers=workers)
+    mae, mse, mag_loss = means.T
+    replicates = dict(zip(METRICS, [mae, mse, np.sqrt(mse), mag_loss]))
+
+    alpha = (1 - confidence) / 2
+    return {
+        metric: [float(np.quantile(values, alpha)), float(np.quantile(values, 1 - alpha))]
+        for metric, values in replicates.items()
+    }
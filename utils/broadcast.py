@@ -0,0 +1,102 @@
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+
+def encode_event(event, data, event_id=None):
+    # One Server-Sent Events message
+    message = f'event: {event}\n'
+    if event_id is not None:
+        message += f'id: {event_id}\n'
+    return message + f'data: {json.dumps(data)}\n\n'
+
+
+class Broadcaster:
+    # Calls produce() once per tick in a background thread and fans the result out
+    # to every subscriber. Each tick is encoded once; a subscriber costs one queue
+    # put. New subscribers get the recent history as a single snapshot, after that
+    # only the new payloads.
+
+    def __init__(self, produce, interval, history=10, max_pending=64, heartbeat=15.0):
+        self.produce = produce
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.max_pending = max_pending
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.max_pending)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            snapshot = list(self._history)
+            # Started on first use so importing the app (e.g. in a pre-forking
+            # server's master process) does not start a thread
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='broadcaster', daemon=True)
+                self._thread.start()
+        return subscriber, snapshot
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event, data):
+        with self._lock:
+            message = encode_event(event, data, next(self._ids))
+            self._history.append(data)
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    # Slow consumer: drop its backlog and close its stream; the
+                    # browser reconnects and resyncs from the snapshot
+                    self._subscribers.discard(subscriber)
+                    with subscriber.mutex:
+                        subscriber.queue.clear()
+                    subscriber.put_nowait(None)
+
+    def stream(self):
+        subscriber, snapshot = self.subscribe()
+        try:
+            yield encode_event('snapshot', snapshot)
+            while True:
+                try:
+                    message = subscriber.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stop.wait(max(0.0, next_tick - time.monotonic())):
+            next_tick += self.interval
+            # Nobody listening: skip the work entirely
+            if not self._subscribers:
+                continue
+            try:
+                data = self.produce()
+            except Exception as e:
+                print(f"Broadcast tick failed: {e}")
+                continue
+            self.publish('prediction', data)
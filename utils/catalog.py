@@ -0,0 +1,146 @@
+import argparse
+import time
+import pandas as pd
+from pathlib import Path
+
+TIMESTAMP_FORMAT = '%m/%d/%Y %H:%M:%S'
+PARQUET_SUFFIXES = {'.parquet', '.pq', '.arrow', '.feather'}
+
+
+def _pyarrow_dataset():
+    # pyarrow is only needed for Parquet/Arrow catalogs
+    try:
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError('Parquet/Arrow catalogs need pyarrow: pip install pyarrow') from e
+    return ds
+
+
+def catalog_format(path):
+    path = Path(path)
+    if path.is_dir() or path.suffix in PARQUET_SUFFIXES:
+        return 'parquet'
+    return 'csv'
+
+
+def parse_timestamps(df):
+    return pd.to_datetime(df['Date'] + ' ' + df['Time'], format=TIMESTAMP_FORMAT, errors='coerce')
+
+
+def _in_bbox(lat, lon, bbox):
+    # bbox = (min_lat, min_lon, max_lat, max_lon); min_lon > max_lon crosses the antimeridian
+    min_lat, min_lon, max_lat, max_lon = bbox
+    in_lon = (lon >= min_lon) & (lon <= max_lon) if min_lon <= max_lon else (lon >= min_lon) | (lon <= max_lon)
+    return (lat >= min_lat) & (lat <= max_lat) & in_lon
+
+
+def _read_csv(path, columns, start, end, bbox):
+    # Column pruning only; CSV has no statistics to skip rows with
+    required = {'Date', 'Time'} | ({'Latitude', 'Longitude'} if bbox is not None else set())
+    usecols = None if columns is None else sorted(set(columns) | required)
+    df = pd.read_csv(path, usecols=usecols)
+    if bbox is not None:
+        df = df[_in_bbox(df['Latitude'], df['Longitude'], bbox)]
+    df['Timestamp'] = parse_timestamps(df)
+    if start is not None:
+        df = df[df['Timestamp'] >= start]
+    if end is not None:
+        df = df[df['Timestamp'] < end]
+    if columns is not None:
+        df = df[[c for c in df.columns if c in set(columns) | {'Timestamp'}]]
+    return df.reset_index(drop=True)
+
+
+def _read_parquet(path, columns, start, end, bbox):
+    ds = _pyarrow_dataset()
+    path = Path(path)
+    file_format = 'feather' if path.suffix in {'.arrow', '.feather'} else 'parquet'
+    dataset = ds.dataset(path, format=file_format, partitioning='hive')
+
+    # Predicates only use fields the dataset has: the year partition (written by
+    # convert_csv_to_parquet) prunes whole directories, a stored Timestamp skips
+    # row groups by their min/max statistics
+    names = dataset.schema.names
+    has_year = 'year' in names
+    has_timestamp = 'Timestamp' in names
+    predicate = None
+
+    def add(condition):
+        nonlocal predicate
+        predicate = condition if predicate is None else predicate & condition
+
+    if has_year and start is not None:
+        add(ds.field('year') >= start.year)
+    if has_year and end is not None:
+        add(ds.field('year') <= end.year)
+    if has_timestamp and start is not None:
+        add(ds.field('Timestamp') >= start.to_pydatetime())
+    if has_timestamp and end is not None:
+        add(ds.field('Timestamp') < end.to_pydatetime())
+    if bbox is not None:
+        add(_in_bbox(ds.field('Latitude'), ds.field('Longitude'), bbox))
+
+    # Without a stored Timestamp it is parsed from Date/Time, as for CSV
+    wanted = None if columns is None else set(columns) | ({'Timestamp'} if has_timestamp else {'Date', 'Time'})
+    selected = None if wanted is None else [c for c in names if c in wanted]
+    df = dataset.to_table(columns=selected, filter=predicate).to_pandas()
+    df = df.drop(columns=['year'], errors='ignore')
+    if has_timestamp:
+        df['Timestamp'] = df['Timestamp'].astype('datetime64[ns]')
+    else:
+        df['Timestamp'] = parse_timestamps(df)
+        if start is not None:
+            df = df[df['Timestamp'] >= start]
+        if end is not None:
+            df = df[df['Timestamp'] < end]
+        if columns is not None:
+            df = df[[c for c in df.columns if c in set(columns) | {'Timestamp'}]]
+    # Fragments are not guaranteed to come back in partition order
+    return df.sort_values('Timestamp', kind='stable').reset_index(drop=True)
+
+
+def read_catalog(path, columns=None, start=None, end=None, bbox=None):
+    # Returns the requested catalog columns plus a parsed 'Timestamp' column,
+    # restricted to start <= Timestamp < end and to the bounding box when given.
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    if catalog_format(path) == 'parquet':
+        return _read_parquet(path, columns, start, end, bbox)
+    return _read_csv(path, columns, start, end, bbox)
+
+
+def convert_csv_to_parquet(csv_path, out_dir, chunksize=1_000_000):
+    # One-time conversion to a year-partitioned Parquet dataset. Timestamps are
+    # parsed once here so readers never parse text again.
+    ds = _pyarrow_dataset()
+    import pyarrow as pa
+
+    out_dir = Path(out_dir)
+    if out_dir.exists() and any(out_dir.iterdir()):
+        raise FileExistsError(f'{out_dir} is not empty')
+    rows = 0
+    for i, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunksize, low_memory=False)):
+        chunk['Timestamp'] = parse_timestamps(chunk).astype('datetime64[s]')
+        chunk = chunk[chunk['Timestamp'].notna()]
+        chunk['year'] = chunk['Timestamp'].dt.year.astype('int32')
+        ds.write_dataset(
+            pa.Table.from_pandas(chunk, preserve_index=False), out_dir,
+            format='parquet', partitioning=['year'], partitioning_flavor='hive',
+            basename_template=f'part-{i:05d}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore',
+            max_rows_per_group=1 << 17
+        )
+        rows += len(chunk)
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert a CSV catalog to a year-partitioned Parquet dataset')
+    parser.add_argument('csv', type=Path)
+    parser.add_argument('out', type=Path)
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = convert_csv_to_parquet(args.csv, args.out, chunksize=args.chunksize)
+    print(f"Wrote {rows} events to {args.out} in {time.perf_counter() - start:.1f} s")
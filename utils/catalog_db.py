@@ -0,0 +1,208 @@
+import argparse
+import os
+import sqlite3
+import time
+import pandas as pd
+from contextlib import closing
+from pathlib import Path
+from utils.catalog import read_catalog
+
+# A box with more R*Tree matches than this is dense enough that scanning the time
+# index in order finds a page sooner than sorting every match
+RTREE_MAX_CANDIDATES = 5000
+
+# Catalog columns stored per event, and their names in the events table
+EVENT_COLUMNS = {
+    'ID': 'event_id',
+    'Latitude': 'latitude',
+    'Longitude': 'longitude',
+    'Depth': 'depth',
+    'Magnitude': 'magnitude',
+    'Magnitude Type': 'magnitude_type',
+    'Type': 'type'
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    rowid INTEGER PRIMARY KEY,
+    time INTEGER NOT NULL,
+    event_id TEXT,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    depth REAL,
+    magnitude REAL NOT NULL,
+    magnitude_type TEXT,
+    type TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS events_rtree USING rtree (
+    id, min_lat, max_lat, min_lon, max_lon
+);
+CREATE TABLE IF NOT EXISTS catalog_info (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Created after the bulk load, which is much faster than maintaining them per row.
+# The time index covers the filter columns, so a time-ordered scan can reject
+# events outside the box or magnitude range without reading the table.
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_events_time ON events (time, latitude, longitude, magnitude);
+CREATE INDEX IF NOT EXISTS idx_events_magnitude ON events (magnitude, time);
+"""
+
+
+def source_signature(catalog_path):
+    # Size and newest mtime of the catalog file, or of every file in a Parquet dataset
+    catalog_path = Path(catalog_path)
+    files = [p for p in catalog_path.rglob('*') if p.is_file()] if catalog_path.is_dir() else [catalog_path]
+    stats = [p.stat() for p in files]
+    return f"{sum(s.st_size for s in stats)}:{max((s.st_mtime_ns for s in stats), default=0)}"
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def build_catalog_db(catalog_path, db_path, chunksize=100_000):
+    # Loads the whole catalog into a new database file and swaps it in, so
+    # readers keep the previous copy until the build is complete. The temporary
+    # name is per process: servers starting together may each build a copy
+    db_path = Path(db_path)
+    tmp = db_path.with_name(f'{db_path.name}.{os.getpid()}.tmp')
+    tmp.unlink(missing_ok=True)
+
+    df = read_catalog(catalog_path, columns=list(EVENT_COLUMNS))
+    df = df[df['Timestamp'].notna()]
+    df = df.rename(columns=EVENT_COLUMNS)
+    for column in EVENT_COLUMNS.values():
+        if column not in df:
+            df[column] = None
+    df['time'] = df['Timestamp'].astype('datetime64[s]').astype('int64')
+    df = df[['time'] + list(EVENT_COLUMNS.values())]
+    df = df.astype(object).where(df.notna(), None)
+
+    with closing(connect(tmp)) as conn:
+        # Nothing reads the temporary file, so durability is not needed until the swap
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        with conn:
+            columns = ', '.join(df.columns)
+            placeholders = ', '.join('?' * len(df.columns))
+            for i in range(0, len(df), chunksize):
+                conn.executemany(f'INSERT INTO events ({columns}) VALUES ({placeholders})',
+                                 df.iloc[i:i + chunksize].itertuples(index=False, name=None))
+            conn.execute('INSERT INTO events_rtree SELECT rowid, latitude, latitude, longitude, longitude FROM events')
+            conn.executescript(INDEXES)
+            conn.executemany('INSERT INTO catalog_info VALUES (?, ?)', [
+                ('source', str(catalog_path)),
+                ('signature', source_signature(catalog_path)),
+                ('events', str(len(df))),
+                ('built_at', str(time.time()))
+            ])
+        conn.execute('ANALYZE')
+    tmp.replace(db_path)
+    return len(df)
+
+
+def sync_catalog_db(catalog_path, db_path):
+    # Rebuilds only when the database is missing or the source catalog changed
+    db_path = Path(db_path)
+    if db_path.exists():
+        with closing(sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)) as conn:
+            info = dict(conn.execute('SELECT key, value FROM catalog_info').fetchall())
+        if info.get('source') == str(catalog_path) and info.get('signature') == source_signature(catalog_path):
+            return False
+    start = time.perf_counter()
+    rows = build_catalog_db(catalog_path, db_path)
+    print(f"Loaded {rows} events into {db_path.name} in {time.perf_counter() - start:.1f} s")
+    return True
+
+
+def encode_cursor(row):
+    return f"{row['time']}:{row['rowid']}"
+
+
+def decode_cursor(cursor):
+    event_time, rowid = cursor.split(':')
+    return int(event_time), int(rowid)
+
+
+def _lon_ranges(bbox):
+    # bbox = (min_lat, min_lon, max_lat, max_lon); min_lon > max_lon crosses the antimeridian
+    min_lat, min_lon, max_lat, max_lon = bbox
+    if min_lon <= max_lon:
+        return [(min_lon, max_lon)]
+    return [(min_lon, 180.0), (-180.0, max_lon)]
+
+
+def query_events(db_path, *args, **kwargs):
+    with closing(sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)) as conn:
+        conn.row_factory = sqlite3.Row
+        return _query_events(conn, *args, **kwargs)
+
+
+def _query_events(conn, start=None, end=None, bbox=None, min_magnitude=None, max_magnitude=None,
+                 limit=100, cursor=None):
+    # Events ordered by (time, rowid), restricted to start <= time < end, the
+    # bounding box and the magnitude range. Pagination is keyset based: the
+    # cursor is the last (time, rowid) returned, so every page is an index seek
+    # rather than an OFFSET scan. Small boxes are resolved through the R*Tree,
+    # large ones by the time-ordered scan. Returns (rows, next_cursor).
+    where, args = [], []
+    if start is not None:
+        where.append('e.time >= ?')
+        args.append(int(pd.Timestamp(start).timestamp()))
+    if end is not None:
+        where.append('e.time < ?')
+        args.append(int(pd.Timestamp(end).timestamp()))
+    if min_magnitude is not None:
+        where.append('e.magnitude >= ?')
+        args.append(float(min_magnitude))
+    if max_magnitude is not None:
+        where.append('e.magnitude <= ?')
+        args.append(float(max_magnitude))
+    index = ''
+    if bbox is not None:
+        min_lat, _, max_lat, _ = bbox
+        boxes = ' OR '.join(['(min_lat <= ? AND max_lat >= ? AND min_lon <= ? AND max_lon >= ?)'] * len(_lon_ranges(bbox)))
+        box_args = [v for lo, hi in _lon_ranges(bbox) for v in (max_lat, min_lat, hi, lo)]
+        candidates = conn.execute(
+            f'SELECT count(*) FROM (SELECT id FROM events_rtree WHERE {boxes} LIMIT ?)',
+            box_args + [RTREE_MAX_CANDIDATES + 1]
+        ).fetchone()[0]
+        if candidates <= RTREE_MAX_CANDIDATES:
+            where.append(f'e.rowid IN (SELECT id FROM events_rtree WHERE {boxes})')
+            args.extend(box_args)
+        else:
+            lons = ' OR '.join(['e.longitude BETWEEN ? AND ?'] * len(_lon_ranges(bbox)))
+            where.append(f'e.latitude BETWEEN ? AND ? AND ({lons})')
+            args.extend([min_lat, max_lat] + [v for lon_range in _lon_ranges(bbox) for v in lon_range])
+            index = ' INDEXED BY idx_events_time'
+    if cursor is not None:
+        where.append('(e.time, e.rowid) > (?, ?)')
+        args.extend(decode_cursor(cursor))
+
+    sql = f'SELECT e.* FROM events e{index}'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY e.time, e.rowid LIMIT ?'
+    args.append(int(limit) + 1)
+
+    rows = conn.execute(sql, args).fetchall()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load a catalog into the indexed SQLite event store')
+    parser.add_argument('catalog', type=Path)
+    parser.add_argument('db', type=Path)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = build_catalog_db(args.catalog, args.db)
+    print(f"Loaded {rows} events into {args.db} in {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,69 @@
+import numpy as np
+from utils.magloss import mag_loss_beta
+
+METRICS = ['Mean Absolute Error', 'Mean Squared Error', 'Root Mean Squared Error', 'Magnitude-Aware Loss']
+MAGNITUDE_BAND_EDGES = [6.0, 6.5, 7.0, 7.5]
+
+
+def magnitude_bands(labels, edges=MAGNITUDE_BAND_EDGES):
+    codes = np.digitize(labels, edges)
+    bounds = [None] + list(edges) + [None]
+    names = []
+    for low, high in zip(bounds[:-1], bounds[1:]):
+        if low is None:
+            names.append(f'Magnitude < {high}')
+        elif high is None:
+            names.append(f'Magnitude >= {low}')
+        else:
+            names.append(f'{low} <= Magnitude < {high}')
+    return codes, names
+
+
+def categories(values, prefix=''):
+    uniques, codes = np.unique(values, return_inverse=True)
+    names = [f'{prefix}{u}' for u in uniques.tolist()]
+    return codes, names
+
+
+def threshold(labels, value):
+    codes = (labels > value).astype(np.int64)
+    return codes, [f'Magnitude <= {value}', f'Magnitude > {value}']
+
+
+def sample_statistics(predictions, labels, beta=mag_loss_beta):
+    # Per-sample absolute error, squared error and magnitude-weighted squared error;
+    # every metric is a mean (or the sqrt of a mean) of one of these columns.
+    predictions = np.asarray(predictions, dtype=np.float64)
+    labels = np.asarray(labels, dtype=np.float64)
+
+    error = predictions - labels
+    squared_error = error ** 2
+    return np.stack([np.abs(error), squared_error, (1 + beta * labels) * squared_error], axis=1)
+
+
+def evaluate_slices(predictions, labels, groupings, beta=mag_loss_beta):
+    # groupings maps a dimension name to (codes, names), where codes assigns every
+    # sample to one slice of that dimension. All slices of a dimension are reduced
+    # together with one bincount per statistic.
+    stats = sample_statistics(predictions, labels, beta).T
+
+    results = {}
+    for dimension, (codes, names) in groupings.items():
+        codes = np.asarray(codes)
+        counts = np.bincount(codes, minlength=len(names))
+        sums = [np.bincount(codes, weights=stat, minlength=len(names)) for stat in stats]
+
+        results[dimension] = {}
+        for i, name in enumerate(names):
+            if counts[i] == 0:
+                continue
+            mae, mse, mag_loss = (s[i] / counts[i] for s in sums)
+            results[dimension][name] = {
+                'Mean Absolute Error': float(mae),
+                'Mean Squared Error': float(mse),
+                'Root Mean Squared Error': float(np.sqrt(mse)),
+                'Magnitude-Aware Loss': float(mag_loss),
+                'Count': int(counts[i])
+            }
+
+    return results
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+from utils.neighborhood import neighborhood_stats
+from utils.seismicity import rolling_seismicity
+
+# Optional features appended to the base preprocess() output. Each entry lists the
+# raw catalog columns it reads, so only selected features cost any I/O or compute.
+FEATURES = {}
+
+# (radius km, window days) pairs for the neighborhood feature
+NEIGHBORHOOD_SCALES = [(50, 7), (100, 30), (200, 365)]
+
+MAGNITUDE_TYPES = ['MW', 'MWC', 'MB', 'MWB', 'MWW', 'MS', 'ML', 'MWR', 'MD', 'MH']
+
+
+def register_feature(name, columns):
+    def decorator(fn):
+        FEATURES[name] = {'columns': list(columns), 'compute': fn}
+        return fn
+    return decorator
+
+
+def _check(names):
+    unknown = [name for name in names if name not in FEATURES]
+    if unknown:
+        raise ValueError(f'Unknown features {unknown}, expected some of {sorted(FEATURES)}')
+
+
+def required_columns(names):
+    _check(names)
+    return sorted({column for name in names for column in FEATURES[name]['columns']})
+
+
+def compute_features(df, names):
+    # df is the filtered raw catalog (plus 'Timestamp' and preprocess()'s
+    # 'Region_Cluster'), row-aligned with preprocess() output
+    _check(names)
+    columns = {}
+    for name in names:
+        columns.update(FEATURES[name]['compute'](df))
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(df)))
+
+
+def impute(values, name):
+    # Median of the observed values plus a missing indicator; most quality columns
+    # are more than half empty, and the indicator keeps that signal.
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    fill = np.median(values[~missing]) if not missing.all() else 0.0
+    return {name: np.where(missing, fill, values), f'{name}_Missing': missing.astype(np.float64)}
+
+
+def one_hot(values, categories, name):
+    # Fixed vocabulary so the feature width does not depend on the data; unseen
+    # values share an 'Other' column
+    codes = pd.Categorical(values, categories=categories).codes
+    encoded = np.eye(len(categories) + 1)[np.where(codes < 0, len(categories), codes)]
+    labels = categories + ['Other']
+    return {f'{name}_{label}': encoded[:, i] for i, label in enumerate(labels)}
+
+
+@register_feature('depth', ['Depth'])
+def depth(df):
+    return {'Depth': df['Depth'].to_numpy(dtype=np.float64)}
+
+
+@register_feature('depth_error', ['Depth Error'])
+def depth_error(df):
+    return impute(df['Depth Error'], 'Depth_Error')
+
+
+@register_feature('magnitude_type', ['Magnitude Type'])
+def magnitude_type(df):
+    return one_hot(df['Magnitude Type'], MAGNITUDE_TYPES, 'Magnitude_Type')
+
+
+@register_feature('magnitude_error', ['Magnitude Error'])
+def magnitude_error(df):
+    return impute(df['Magnitude Error'], 'Magnitude_Error')
+
+
+@register_feature('station_counts', ['Depth Seismic Stations', 'Magnitude Seismic Stations'])
+def station_counts(df):
+    return {
+        **impute(df['Depth Seismic Stations'], 'Depth_Stations'),
+        **impute(df['Magnitude Seismic Stations'], 'Magnitude_Stations')
+    }
+
+
+@register_feature('azimuthal_gap', ['Azimuthal Gap'])
+def azimuthal_gap(df):
+    return impute(df['Azimuthal Gap'], 'Azimuthal_Gap')
+
+
+@register_feature('horizontal_error', ['Horizontal Distance', 'Horizontal Error'])
+def horizontal_error(df):
+    return {
+        **impute(df['Horizontal Distance'], 'Horizontal_Distance'),
+        **impute(df['Horizontal Error'], 'Horizontal_Error')
+    }
+
+
+@register_feature('rms', ['Root Mean Square'])
+def rms(df):
+    return impute(df['Root Mean Square'], 'RMS')
+
+
+def _epoch_seconds(df):
+    return df['Timestamp'].astype('datetime64[s]').astype('int64').to_numpy(dtype=np.float64)
+
+
+@register_feature('neighborhood', ['Latitude', 'Longitude', 'Magnitude'])
+def neighborhood(df):
+    # Earlier events near each event at several distance/time scales
+    times = _epoch_seconds(df)
+    columns = {}
+    for radius_km, days in NEIGHBORHOOD_SCALES:
+        counts, max_magnitude = neighborhood_stats(
+            df['Latitude'], df['Longitude'], df['Magnitude'], times, radius_km, days * 86400.0
+        )
+        columns[f'Neighbors_{radius_km}km_{days}d'] = counts.astype(np.float64)
+        columns[f'Neighbors_Max_Magnitude_{radius_km}km_{days}d'] = max_magnitude
+    return columns
+
+
+@register_feature('seismicity', ['Magnitude'])
+def seismicity(df):
+    # Rolling counts, magnitudes, b-value and inter-event times over the whole catalog
+    return rolling_seismicity(_epoch_seconds(df), df['Magnitude'], prefix='Seismicity')
+
+
+@register_feature('regional_seismicity', ['Magnitude'])
+def regional_seismicity(df):
+    # The same statistics restricted to events of the same Region_Cluster
+    return rolling_seismicity(_epoch_seconds(df), df['Magnitude'], groups=df['Region_Cluster'],
+                              prefix='Regional_Seismicity')
@@ -0,0 +1,116 @@
+import queue
+import threading
+import torch
+from torch.utils.data import DataLoader, Dataset, Sampler
+
+
+class TensorBatchDataset(Dataset):
+    # Indexed with a whole batch (slice or index tensor) instead of one sample,
+    # so a batch is a single slice/gather per tensor and nothing needs collating.
+    def __init__(self, *tensors):
+        self.tensors = tensors
+
+    def __len__(self):
+        return len(self.tensors[0])
+
+    def __getitem__(self, index):
+        return tuple(tensor[index] for tensor in self.tensors)
+
+
+class SliceBatchSampler(Sampler):
+    # Yields contiguous slices when not shuffling and index tensors of one
+    # random permutation when shuffling.
+    def __init__(self, n_samples, batch_size, shuffle=False, drop_last=False):
+        self.n_samples = n_samples
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+
+    def __len__(self):
+        if self.drop_last:
+            return self.n_samples // self.batch_size
+        return (self.n_samples + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        order = torch.randperm(self.n_samples) if self.shuffle else None
+        for i in range(len(self)):
+            start = i * self.batch_size
+            stop = min(start + self.batch_size, self.n_samples)
+            if order is None:
+                yield slice(start, stop)
+            else:
+                yield order[start:stop]
+
+
+class BackgroundPrefetcher:
+    # Pulls batches from the loader in a background thread and moves them to
+    # the device ahead of time, keeping up to `depth` batches in flight.
+    def __init__(self, loader, device, depth=2):
+        self.loader = loader
+        self.device = device
+        self.depth = depth
+
+    def __len__(self):
+        return len(self.loader)
+
+    def _put(self, out, stop, item):
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, out, stop):
+        try:
+            for batch in self.loader:
+                batch = tuple(t.to(self.device, non_blocking=True) for t in batch)
+                if not self._put(out, stop, batch):
+                    return
+            self._put(out, stop, None)
+        except Exception as e:
+            self._put(out, stop, e)
+
+    def __iter__(self):
+        out = queue.Queue(maxsize=self.depth)
+        stop = threading.Event()
+        worker = threading.Thread(target=self._produce, args=(out, stop), daemon=True)
+        worker.start()
+        try:
+            while True:
+                batch = out.get()
+                if batch is None:
+                    break
+                if isinstance(batch, Exception):
+                    raise batch
+                yield batch
+        finally:
+            stop.set()
+            worker.join()
+
+
+def make_dataloader(X, y, batch_size, shuffle, device, num_workers=0, pin_memory=True,
+                    persistent_workers=True, prefetch_factor=2, prefetch_batches=2):
+    dataset = TensorBatchDataset(X, y)
+    sampler = SliceBatchSampler(len(dataset), batch_size, shuffle=shuffle)
+
+    loader_kwargs = {}
+    if num_workers > 0:
+        loader_kwargs['persistent_workers'] = persistent_workers
+        loader_kwargs['prefetch_factor'] = prefetch_factor
+
+    # batch_size=None disables automatic batching: every sampler item is
+    # already a full batch.
+    loader = DataLoader(
+        dataset,
+        sampler=sampler,
+        batch_size=None,
+        num_workers=num_workers,
+        pin_memory=pin_memory and device.type == 'cuda',
+        **loader_kwargs
+    )
+
+    if prefetch_batches > 0:
+        return BackgroundPrefetcher(loader, device, depth=prefetch_batches)
+    return loader
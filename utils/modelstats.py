@@ -0,0 +1,84 @@
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+
+
+def count_parameters(model):
+    return sum(p.numel() for p in model.parameters())
+
+
+def _module_flops(module, inputs, output):
+    x = inputs[0]
+    if isinstance(module, (nn.LSTM, nn.GRU)):
+        gates = 4 if isinstance(module, nn.LSTM) else 3
+        steps = x.shape[1] if module.batch_first else x.shape[0]
+        directions = 2 if module.bidirectional else 1
+        flops, in_size = 0, module.input_size
+        for _ in range(module.num_layers):
+            flops += directions * steps * 2 * gates * module.hidden_size * (in_size + module.hidden_size)
+            in_size = module.hidden_size * directions
+        return flops
+    if isinstance(module, nn.MultiheadAttention):
+        steps, embed_dim = x.shape[-2], module.embed_dim
+        projections = 2 * steps * embed_dim * 4 * embed_dim
+        attention = 2 * 2 * steps * steps * embed_dim
+        return projections + attention
+    if isinstance(module, nn.Linear):
+        return 2 * module.in_features * module.out_features * (x.numel() // x.shape[0] // module.in_features)
+    if isinstance(module, nn.Conv1d):
+        out_steps = output.shape[-1]
+        return 2 * (module.in_channels // module.groups) * module.kernel_size[0] * module.out_channels * out_steps
+    return 0
+
+
+def count_flops(model, input_shape):
+    # Multiply-adds (counted as 2 FLOPs) of one forward pass for a single sample,
+    # measured from the shapes each layer actually sees. Elementwise ops are ignored.
+    counted = (nn.LSTM, nn.GRU, nn.MultiheadAttention, nn.Linear, nn.Conv1d)
+    total = [0]
+    handles = []
+    for module in model.modules():
+        if isinstance(module, counted):
+            def hook(module, inputs, output):
+                total[0] += _module_flops(module, inputs, output)
+            handles.append(module.register_forward_hook(hook))
+
+    device = next(model.parameters()).device
+    was_training = model.training
+    model.eval()
+    try:
+        with torch.no_grad():
+            model(torch.zeros(1, *input_shape[1:], device=device))
+    finally:
+        for handle in handles:
+            handle.remove()
+        model.train(was_training)
+    return total[0]
+
+
+def measure_latency(model, input_shape, repeats=50, warmup=5, device=torch.device('cpu')):
+    # Per-request latency of one forward pass, in milliseconds. The model is put
+    # back on its own device and in its own mode afterwards.
+    original_device = next(model.parameters()).device
+    was_training = model.training
+    model.to(device).eval()
+    x = torch.randn(*input_shape, device=device)
+    timings = []
+    try:
+        with torch.no_grad():
+            for i in range(warmup + repeats):
+                start = time.perf_counter()
+                model(x)
+                if device.type == 'cuda':
+                    torch.cuda.synchronize()
+                if i >= warmup:
+                    timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        model.to(original_device)
+        model.train(was_training)
+    return {
+        'p50': float(np.percentile(timings, 50)),
+        'p95': float(np.percentile(timings, 95)),
+        'mean': float(np.mean(timings))
+    }
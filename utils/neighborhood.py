@@ -0,0 +1,46 @@
+import numpy as np
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def neighborhood_stats(lat, lon, magnitude, times, radius_km, window):
+    # For every event, the number and maximum magnitude of earlier events within
+    # radius_km (great-circle) in the preceding `window` seconds. Events are split
+    # into time blocks of one window each with a BallTree per block, so an
+    # event's candidates come from its own block and the one before it only,
+    # rather than from the whole catalog.
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    magnitude = np.asarray(magnitude, dtype=np.float64)
+    times = np.asarray(times, dtype=np.float64)
+    n = len(times)
+    counts = np.zeros(n, dtype=np.int64)
+    max_magnitude = np.zeros(n, dtype=np.float64)
+    if n == 0:
+        return counts, max_magnitude
+
+    points = np.radians(np.column_stack([lat, lon]))
+    blocks = ((times - times.min()) // window).astype(np.int64)
+    order = np.argsort(blocks, kind='stable')
+    block_ids, starts = np.unique(blocks[order], return_index=True)
+    members = dict(zip(block_ids, np.split(order, starts[1:])))
+    trees = {block: BallTree(points[idx], metric='haversine') for block, idx in members.items()}
+
+    radius = radius_km / EARTH_RADIUS_KM
+    for block, idx in members.items():
+        for previous in (block - 1, block):
+            if previous not in trees:
+                continue
+            neighbors = trees[previous].query_radius(points[idx], r=radius)
+            lengths = np.fromiter((len(a) for a in neighbors), dtype=np.int64, count=len(idx))
+            if not lengths.any():
+                continue
+            query = np.repeat(idx, lengths)
+            candidate = members[previous][np.concatenate(neighbors)]
+            # Strictly earlier events, which also drops the event itself
+            keep = (times[candidate] < times[query]) & (times[candidate] >= times[query] - window)
+            query, candidate = query[keep], candidate[keep]
+            counts += np.bincount(query, minlength=n)
+            np.maximum.at(max_magnitude, query, magnitude[candidate])
+    return counts, max_magnitude
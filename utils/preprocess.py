@@ -2,6 +2,11 @@ import pandas as pd
 import numpy as np
 from geopy.distance import geodesic
 from sklearn.cluster import KMeans
+from utils.catalog import parse_timestamps
+from utils.profiling import span, profiled
+
+CATALOG_COLUMNS = ['Date', 'Time', 'Latitude', 'Longitude', 'Magnitude']
+MIN_TIMESTAMP = pd.Timestamp('1970-01-01')
 
 def calculate_distance(current_lat, current_lon, prev_lat, prev_lon):
     if pd.isnull(prev_lat) or pd.isnull(prev_lon):
@@ -9,13 +14,19 @@ def calculate_distance(current_lat, current_lon, prev_lat, prev_lon):
     return geodesic((current_lat, current_lon), (prev_lat, prev_lon)).km
 
 
+@profiled('preprocess')
 def preprocess(data):
-    data = data[['Date', 'Time', 'Latitude', 'Longitude', 'Magnitude']]
-    data.loc[:, 'Timestamp'] = pd.to_datetime(data['Date'] + ' ' + data['Time'], format="%m/%d/%Y %H:%M:%S", errors='coerce')
-    data = data[data['Timestamp'] >= pd.Timestamp('1970-01-01')]
+    # Catalogs read through utils.catalog arrive with timestamps already parsed
+    if 'Timestamp' in data.columns:
+        data = data[['Latitude', 'Longitude', 'Magnitude', 'Timestamp']]
+    else:
+        data = data[CATALOG_COLUMNS]
+        with span('preprocess.parse_timestamps'):
+            data.loc[:, 'Timestamp'] = parse_timestamps(data)
+        data = data.drop(['Date', 'Time'], axis=1)
+    data = data[data['Timestamp'] >= MIN_TIMESTAMP]
 
     data.reset_index(drop=True, inplace=True)
-    data = data.drop(['Date', 'Time'], axis=1)
 
     data['Time_Delta'] = data['Timestamp'].diff().dt.total_seconds()    
     data = data.fillna(0)
@@ -42,16 +53,18 @@ def preprocess(data):
     data['Prev_Latitude'] = data['Latitude'].shift(1)
     data['Prev_Longitude'] = data['Longitude'].shift(1)
     
-    data['Geodesic_Distance'] = data.apply(
-        lambda row: calculate_distance(row['Latitude'], row['Longitude'], 
-                                       row['Prev_Latitude'], row['Prev_Longitude']), 
-        axis=1
-    )
+    with span('preprocess.geodesic_distance'):
+        data['Geodesic_Distance'] = data.apply(
+            lambda row: calculate_distance(row['Latitude'], row['Longitude'], 
+                                           row['Prev_Latitude'], row['Prev_Longitude']), 
+            axis=1
+        )
     
     data = data.drop(columns=['Prev_Latitude', 'Prev_Longitude'])
  
-    kmeans = KMeans(n_clusters=10, random_state=42)
-    data['Region_Cluster'] = kmeans.fit_predict(data[['Latitude', 'Longitude']])
+    with span('preprocess.kmeans'):
+        kmeans = KMeans(n_clusters=10, random_state=42)
+        data['Region_Cluster'] = kmeans.fit_predict(data[['Latitude', 'Longitude']])
 
     data['Time_Delta_Lag1'] = data['Time_Delta'].shift(1)
     data.fillna(0, inplace=True)
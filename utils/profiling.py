@@ -0,0 +1,136 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from utils.common import read_yaml
+
+config = Path(__file__).parent.parent / 'config.yaml'
+config = read_yaml(config)
+
+# EQ_PROFILE=1/0 in the environment overrides config.yaml
+_enabled = os.environ.get('EQ_PROFILE', str(int(bool(config.get('profile', False))))) not in ('', '0')
+_torch_profiler = bool(config.get('torch_profiler', False))
+# Raw spans for trace export, bounded so a long-running server does not grow
+# without limit; per-name totals for summary() cover every span ever recorded
+_events = deque(maxlen=int(config.get('profile_max_events', 100000)))
+_totals = {}
+_totals_lock = threading.Lock()
+_null_span = contextlib.nullcontext()
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = flag
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    _events.clear()
+    with _totals_lock:
+        _totals.clear()
+
+
+class _Span:
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        # deque.append is atomic under the GIL, so spans from any thread can record here
+        _events.append((self.name, self.start, end - self.start, os.getpid(), threading.get_ident(), self.args))
+        with _totals_lock:
+            count, total = _totals.get(self.name, (0, 0))
+            _totals[self.name] = (count + 1, total + end - self.start)
+        return False
+
+
+def span(name, **args):
+    # Disabled spans return one shared no-op context manager, so the off cost is a
+    # global lookup and a call.
+    if not _enabled:
+        return _null_span
+    return _Span(name, args)
+
+
+def profiled(name):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def profile_iter(iterable, name):
+    # Times each next() call, i.e. how long the consumer waited for the producer
+    if not _enabled:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        with _Span(name, {}):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def summary():
+    with _totals_lock:
+        totals = dict(_totals)
+    return {
+        name: {'count': count, 'total_ms': total / 1e6, 'mean_ms': total / count / 1e6}
+        for name, (count, total) in sorted(totals.items(), key=lambda item: -item[1][1])
+    }
+
+
+def print_summary():
+    print(f"{'span':<40} {'count':>8} {'total ms':>12} {'mean ms':>10}")
+    for name, stats in summary().items():
+        print(f"{name:<40} {stats['count']:>8} {stats['total_ms']:>12.2f} {stats['mean_ms']:>10.3f}")
+
+
+def export_chrome_trace(path):
+    # Complete ("X") events in microseconds, loadable in chrome://tracing or
+    # Perfetto; holds the most recent profile_max_events spans
+    trace_events = [
+        {'name': name, 'ph': 'X', 'ts': start / 1e3, 'dur': duration / 1e3, 'pid': pid, 'tid': tid, 'args': args}
+        for name, start, duration, pid, tid, args in list(_events)
+    ]
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+
+
+@contextlib.contextmanager
+def torch_profile(trace_path):
+    # Operator-level torch.profiler trace, only when profiling and torch_profiler are both on
+    if not (_enabled and _torch_profiler):
+        yield None
+        return
+    import torch
+    activities = [torch.profiler.ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(torch.profiler.ProfilerActivity.CUDA)
+    with torch.profiler.profile(activities=activities, record_shapes=True, profile_memory=True) as prof:
+        yield prof
+    Path(trace_path).parent.mkdir(parents=True, exist_ok=True)
+    prof.export_chrome_trace(str(trace_path))
@@ -0,0 +1,84 @@
+import math
+import threading
+import numpy as np
+
+
+class RollingErrorTracker:
+    # Rolling MAE / RMSE / bias over several window lengths. Errors live in one
+    # ring buffer sized for the longest window; each window keeps running sums,
+    # so an update adds the new error and subtracts the one that left the window.
+
+    def __init__(self, windows=(10, 100, 1000)):
+        self.windows = sorted(set(int(w) for w in windows))
+        self.capacity = self.windows[-1]
+        self._errors = np.zeros(self.capacity)
+        self._count = 0
+        # window -> [sum of |e|, sum of e^2, sum of e]
+        self._sums = {w: [0.0, 0.0, 0.0] for w in self.windows}
+        self._lock = threading.Lock()
+
+    def update(self, predicted, actual):
+        error = float(predicted) - float(actual)
+        with self._lock:
+            for w, sums in self._sums.items():
+                if self._count >= w:
+                    old = self._errors[(self._count - w) % self.capacity]
+                    sums[0] -= abs(old)
+                    sums[1] -= old * old
+                    sums[2] -= old
+                sums[0] += abs(error)
+                sums[1] += error * error
+                sums[2] += error
+            self._errors[self._count % self.capacity] = error
+            self._count += 1
+            # Running sums drift with add/subtract; recompute them once per lap
+            # of the buffer, which keeps updates amortized O(1)
+            if self._count % self.capacity == 0:
+                self._resync()
+        return error
+
+    def _resync(self):
+        for w in self.windows:
+            recent = self._recent(w)
+            self._sums[w] = [float(np.abs(recent).sum()), float((recent ** 2).sum()), float(recent.sum())]
+
+    def _recent(self, w):
+        n = min(w, self._count)
+        idx = (self._count - n + np.arange(n)) % self.capacity
+        return self._errors[idx]
+
+    def snapshot(self):
+        # Raw counts and sums; snapshots from several workers can be combined()
+        with self._lock:
+            return {
+                w: {'count': min(w, self._count), 'abs_sum': s[0], 'sq_sum': s[1], 'sum': s[2]}
+                for w, s in self._sums.items()
+            }
+
+    @staticmethod
+    def combine(snapshots):
+        combined = {}
+        for snapshot in snapshots:
+            for w, s in snapshot.items():
+                c = combined.setdefault(w, {'count': 0, 'abs_sum': 0.0, 'sq_sum': 0.0, 'sum': 0.0})
+                for key in c:
+                    c[key] += s[key]
+        return combined
+
+    @staticmethod
+    def summarize(snapshot):
+        return {
+            w: {
+                'count': s['count'],
+                'mae': s['abs_sum'] / s['count'] if s['count'] else None,
+                'rmse': math.sqrt(max(s['sq_sum'], 0.0) / s['count']) if s['count'] else None,
+                'bias': s['sum'] / s['count'] if s['count'] else None
+            }
+            for w, s in snapshot.items()
+        }
+
+    def metrics(self):
+        return self.summarize(self.snapshot())
+
+    def mae(self, window=None):
+        return self.metrics()[window or self.windows[0]]['mae']
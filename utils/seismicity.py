@@ -0,0 +1,117 @@
+import numpy as np
+
+# Windows of strictly earlier events: the last k events and the last T days
+LAST_EVENTS = [50]
+LAST_DAYS = [30, 365]
+
+# Aki-Utsu b-value: catalog magnitudes are reported to 0.1, and fewer events than
+# this leave the estimate to the Gutenberg-Richter default
+MAGNITUDE_BIN = 0.1
+B_MIN_EVENTS = 10
+B_DEFAULT = 1.0
+
+SECONDS_PER_DAY = 86400.0
+VARIANCE_TOLERANCE = 1e-10
+
+
+def range_max(values, lo, hi):
+    # max(values[lo:hi]) for every (lo, hi) pair, 0 for empty ranges. Sparse table
+    # built one level at a time: level k holds the max of each run of 2**k values,
+    # and ranges whose length needs level k are answered by two overlapping runs
+    # before the next level replaces it, so memory stays O(n).
+    length = hi - lo
+    out = np.zeros(len(lo), dtype=np.float64)
+    if not (length > 0).any():
+        return out
+    level = np.floor(np.log2(np.maximum(length, 1))).astype(np.int64)
+    level[length <= 0] = -1
+    table = np.asarray(values, dtype=np.float64)
+    width = 1
+    for k in range(int(level.max()) + 1):
+        if k:
+            table = np.maximum(table[:-width], table[width:])
+            width *= 2
+        query = np.flatnonzero(level == k)
+        out[query] = np.maximum(table[lo[query]], table[hi[query] - width])
+    return out
+
+
+def window_stats(gaps, magnitude, lo, hi, completeness):
+    # Statistics over events lo..hi-1 from prefix sums, O(1) per window; gaps[j]
+    # is the time in days since event j-1
+    count = hi - lo
+    n_gaps = np.maximum(count - 1, 0)
+    magnitude_sums = np.r_[0.0, np.cumsum(magnitude)]
+    gap_sums = np.r_[0.0, np.cumsum(gaps)]
+    gap_squares = np.r_[0.0, np.cumsum(gaps * gaps)]
+    # Gaps inside the window are those of events lo+1..hi-1
+    first_gap = np.minimum(lo + 1, hi)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, (magnitude_sums[hi] - magnitude_sums[lo]) / count, 0.0)
+        b_value = np.log10(np.e) / (mean - (completeness - MAGNITUDE_BIN / 2))
+        mean_gap = np.where(n_gaps > 0, (gap_sums[hi] - gap_sums[first_gap]) / n_gaps, 0.0)
+        gap_variance = np.where(n_gaps > 0, (gap_squares[hi] - gap_squares[first_gap]) / n_gaps, 0.0) - mean_gap ** 2
+        # Prefix-sum differences leave rounding noise around a zero variance
+        # (e.g. a single gap), which the square root would blow up
+        gap_variance = np.where(gap_variance > VARIANCE_TOLERANCE * mean_gap ** 2, gap_variance, 0.0)
+        gap_cv = np.where(mean_gap > 0, np.sqrt(gap_variance) / mean_gap, 0.0)
+
+    return {
+        'Count': count.astype(np.float64),
+        'Mean_Magnitude': mean,
+        'Max_Magnitude': range_max(magnitude, lo, hi),
+        'B_Value': np.where((count >= B_MIN_EVENTS) & np.isfinite(b_value), b_value, B_DEFAULT),
+        'Mean_Interevent_Days': mean_gap,
+        'Interevent_CV': gap_cv
+    }
+
+
+def rolling_seismicity(times, magnitude, groups=None, prefix='Seismicity'):
+    # Rolling statistics over the events preceding each one, for every window in
+    # LAST_EVENTS and LAST_DAYS, optionally restricted to events of the same group.
+    # Events are sorted once by (group, time); window starts are then index
+    # offsets or a single searchsorted, and every statistic but the maximum is a
+    # prefix-sum difference, O(1) per event with no per-window loop.
+    times = np.asarray(times, dtype=np.float64)
+    magnitude = np.asarray(magnitude, dtype=np.float64)
+    n = len(times)
+    if n == 0:
+        return {}
+
+    if groups is None:
+        order = np.argsort(times, kind='stable')
+        group_rank = np.zeros(n, dtype=np.int64)
+    else:
+        groups = np.asarray(groups)
+        order = np.lexsort((times, groups))
+        sorted_groups = groups[order]
+        group_rank = np.cumsum(np.r_[False, sorted_groups[1:] != sorted_groups[:-1]])
+    t = times[order]
+    m = magnitude[order]
+    index = np.arange(n)
+    group_start = np.searchsorted(group_rank, group_rank, 'left')
+    # Groups laid end to end on one time axis, further apart than any window, so
+    # time windows never reach into the previous group
+    span = t.max() - t.min() + max(LAST_DAYS, default=0) * SECONDS_PER_DAY + 1.0
+    t_key = (t - t.min()) + group_rank * span
+    completeness = magnitude.min()
+    # No gap across a group boundary; it would never be inside a window, but its
+    # size would swamp the precision of the prefix sums
+    gaps = np.r_[0.0, np.diff(t)] / SECONDS_PER_DAY
+    gaps[group_start == index] = 0.0
+
+    # Every window ends at the first event of the group sharing this event's
+    # timestamp: same-time rows are usually one quake reported twice, and would
+    # otherwise leak the target magnitude into its own features
+    end = np.searchsorted(t_key, t_key, 'left')
+    windows = {f'{k}ev': np.maximum(end - k, group_start) for k in LAST_EVENTS}
+    windows.update({f'{d}d': np.searchsorted(t_key, t_key - d * SECONDS_PER_DAY, 'left') for d in LAST_DAYS})
+
+    columns = {}
+    for label, lo in windows.items():
+        for name, values in window_stats(gaps, m, lo, end, completeness).items():
+            column = np.empty(n, dtype=np.float64)
+            column[order] = values
+            columns[f'{prefix}_{name}_{label}'] = column
+    return columns
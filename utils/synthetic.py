@@ -0,0 +1,237 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+COLUMNS = [
+    'Date', 'Time', 'Latitude', 'Longitude', 'Type', 'Depth', 'Depth Error', 'Depth Seismic Stations',
+    'Magnitude', 'Magnitude Type', 'Magnitude Error', 'Magnitude Seismic Stations', 'Azimuthal Gap',
+    'Horizontal Distance', 'Horizontal Error', 'Root Mean Square', 'ID', 'Source', 'Location Source',
+    'Magnitude Source', 'Status'
+]
+
+START = pd.Timestamp('1965-01-01')
+END = pd.Timestamp('2017-01-01')
+SECONDS_PER_DAY = 86400
+
+# Completeness magnitude and Gutenberg-Richter b-value of database.csv
+MC = 5.5
+B_VALUE = 1.0
+MAX_MAGNITUDE = 9.5
+
+# ETAS cascade: each event of magnitude m triggers Poisson(K * 10 ** (ALPHA * (m - MC)))
+# aftershocks with Omori-Utsu delays. With b = 1 the branching ratio is about 0.42,
+# i.e. a bit under half of all events are aftershocks.
+ETAS_K = 0.1
+ETAS_ALPHA = 0.8
+OMORI_C_DAYS = 0.01
+OMORI_P = 1.1
+MAX_AFTERSHOCK_DAYS = 3650
+
+# Background seismicity hotspots: latitude, longitude, spread (degrees), weight
+HOTSPOTS = np.array([
+    [36.0, 141.0, 3.0, 0.12],    # Japan
+    [-5.0, 120.0, 6.0, 0.12],    # Indonesia
+    [-25.0, -70.0, 6.0, 0.08],   # Chile
+    [-10.0, -77.0, 4.0, 0.04],   # Peru
+    [52.0, -170.0, 6.0, 0.06],   # Aleutians
+    [54.0, 160.0, 3.0, 0.04],    # Kamchatka
+    [-20.0, -177.0, 4.0, 0.07],  # Tonga-Fiji
+    [-6.0, 150.0, 4.0, 0.06],    # Papua New Guinea / Solomon Islands
+    [-15.0, 167.0, 3.0, 0.04],   # Vanuatu
+    [12.0, 125.0, 4.0, 0.05],    # Philippines
+    [16.0, -97.0, 4.0, 0.04],    # Mexico / Central America
+    [31.5, 77.0, 4.0, 0.04],     # Himalaya
+    [35.0, 55.0, 5.0, 0.04],     # Iran
+    [38.0, 25.0, 4.0, 0.03],     # Eastern Mediterranean
+    [-40.0, 175.0, 3.0, 0.03],   # New Zealand
+    [37.0, -120.0, 3.0, 0.02],   # California
+    [-58.0, -25.0, 3.0, 0.02],   # South Sandwich Islands
+])
+UNIFORM_BACKGROUND = 0.02
+
+MAGNITUDE_TYPES = np.array(['MW', 'MWC', 'MB', 'MWB', 'MWW', 'MS', 'ML', 'MD', 'MH', 'MWR'])
+MAGNITUDE_TYPE_WEIGHTS = np.array([0.33, 0.25, 0.16, 0.11, 0.08, 0.03, 0.02, 0.01, 0.005, 0.005])
+
+
+def gutenberg_richter(rng, n, mc=MC, b=B_VALUE, max_magnitude=MAX_MAGNITUDE):
+    # Exponential magnitudes above mc, truncated at max_magnitude by inverse CDF
+    beta = b * np.log(10)
+    u = rng.random(n)
+    truncation = 1 - np.exp(-beta * (max_magnitude - mc))
+    return mc - np.log(1 - u * truncation) / beta
+
+
+def omori_delays(rng, n, c=OMORI_C_DAYS, p=OMORI_P, max_days=MAX_AFTERSHOCK_DAYS):
+    # Inverse CDF of the Omori-Utsu rate (1 + t / c) ** -p truncated to [0, max_days]
+    u = rng.random(n)
+    tail = (1 + max_days / c) ** (1 - p)
+    return c * ((1 - u * (1 - tail)) ** (1 / (1 - p)) - 1)
+
+
+def _background_locations(rng, n):
+    weights = np.append(HOTSPOTS[:, 3], UNIFORM_BACKGROUND)
+    source = rng.choice(len(weights), size=n, p=weights / weights.sum())
+    hotspot = source < len(HOTSPOTS)
+    centers = HOTSPOTS[np.minimum(source, len(HOTSPOTS) - 1)]
+
+    lats = np.where(hotspot, centers[:, 0] + rng.normal(0, 1, n) * centers[:, 2], rng.uniform(-70, 70, n))
+    lons = np.where(hotspot, centers[:, 1] + rng.normal(0, 1, n) * centers[:, 2], rng.uniform(-180, 180, n))
+    # Hotspots near the antimeridian spill over it
+    return np.clip(lats, -90, 90), (lons + 180) % 360 - 180
+
+
+def _depths(rng, n):
+    # Mostly shallow crustal events, with a deep slab population
+    deep = rng.random(n) < 0.2
+    return np.where(deep, rng.uniform(70, 650, n), rng.exponential(25, n))
+
+
+def _cascade(rng, times, lats, lons, depths, mags):
+    # All generations of aftershocks triggered by the given events, one vectorized
+    # pass per generation
+    generations = []
+    while len(mags):
+        n_children = rng.poisson(ETAS_K * 10 ** (ETAS_ALPHA * (mags - MC)))
+        parent = np.repeat(np.arange(len(mags)), n_children)
+        if not len(parent):
+            break
+        n = len(parent)
+
+        # Aftershock zone scales with the parent's rupture length (km)
+        rupture_km = 10 ** (0.5 * mags[parent] - 1.8)
+        lat_offset = rng.normal(0, 1, n) * rupture_km / 111.0
+        lon_offset = rng.normal(0, 1, n) * rupture_km / (111.0 * np.maximum(np.cos(np.radians(lats[parent])), 0.1))
+
+        times = times[parent] + (omori_delays(rng, n) * SECONDS_PER_DAY).astype(np.int64)
+        lats = np.clip(lats[parent] + lat_offset, -90, 90)
+        lons = (lons[parent] + lon_offset + 180) % 360 - 180
+        depths = np.clip(depths[parent] + rng.normal(0, 5, n), 0, 700)
+        mags = gutenberg_richter(rng, n)
+        generations.append((times, lats, lons, depths, mags))
+
+    if not generations:
+        return None
+    return tuple(np.concatenate(columns) for columns in zip(*generations))
+
+
+def _format_timestamps(times):
+    # strftime formats one row at a time; rearranging the characters of the ISO
+    # strings is vectorized. Returns 'MM/DD/YYYY' and 'HH:MM:SS' arrays.
+    iso = np.datetime_as_string(np.datetime64(START, 's') + times.astype('timedelta64[s]'), unit='s')
+    chars = iso.astype('U19').view('U1').reshape(-1, 19)
+    slash = np.full((len(iso), 1), '/')
+    dates = np.hstack([chars[:, 5:7], slash, chars[:, 8:10], slash, chars[:, 0:4]])
+    return np.ascontiguousarray(dates).view('U10').ravel(), np.ascontiguousarray(chars[:, 11:19]).view('U8').ravel()
+
+
+def _to_frame(rng, times, lats, lons, depths, mags, first_id):
+    n = len(times)
+    dates, clock = _format_timestamps(times)
+
+    magnitude_type = MAGNITUDE_TYPES[rng.choice(len(MAGNITUDE_TYPES), size=n, p=MAGNITUDE_TYPE_WEIGHTS)]
+    # Quality columns are sparse in the real catalog; keep them mostly missing
+    reported = rng.random(n) < 0.2
+
+    return pd.DataFrame({
+        'Date': dates,
+        'Time': clock,
+        'Latitude': lats.round(3),
+        'Longitude': lons.round(3),
+        'Type': 'Earthquake',
+        'Depth': depths.round(1),
+        'Depth Error': np.where(rng.random(n) < 0.2, rng.gamma(2, 2, n).round(1), np.nan),
+        'Depth Seismic Stations': np.where(rng.random(n) < 0.15, rng.poisson(200, n), np.nan),
+        'Magnitude': mags.round(1),
+        'Magnitude Type': magnitude_type,
+        'Magnitude Error': np.where(rng.random(n) < 0.05, rng.uniform(0.05, 0.3, n).round(2), np.nan),
+        'Magnitude Seismic Stations': np.where(rng.random(n) < 0.1, rng.poisson(50, n), np.nan),
+        'Azimuthal Gap': np.where(rng.random(n) < 0.3, rng.uniform(10, 200, n).round(1), np.nan),
+        'Horizontal Distance': np.where(rng.random(n) < 0.07, rng.exponential(3, n).round(3), np.nan),
+        'Horizontal Error': np.where(rng.random(n) < 0.05, rng.gamma(2, 3, n).round(1), np.nan),
+        'Root Mean Square': np.where(reported | (rng.random(n) < 0.6), rng.gamma(4, 0.25, n).round(4), np.nan),
+        'ID': np.char.add('SYN', np.arange(first_id, first_id + n).astype(str)),
+        'Source': 'SYN',
+        'Location Source': 'SYN',
+        'Magnitude Source': 'SYN',
+        'Status': 'Automatic'
+    }, columns=COLUMNS)
+
+
+def branching_ratio():
+    # Expected direct aftershocks per event under the truncated GR distribution
+    beta = B_VALUE * np.log(10)
+    gamma = beta - ETAS_ALPHA * np.log(10)
+    span = MAX_MAGNITUDE - MC
+    return ETAS_K * beta / gamma * (1 - np.exp(-gamma * span)) / (1 - np.exp(-beta * span))
+
+
+def iter_catalog(n_events, chunk_events=1_000_000, seed=42, start=START, end=END):
+    # Yields time-ordered DataFrames of roughly chunk_events rows. The time range is
+    # cut into slices; each slice draws its background events, runs their cascades
+    # and emits everything that falls inside the slice. Aftershocks past the slice
+    # end are carried over, so memory stays bounded by the chunk size plus pending
+    # aftershocks.
+    rng = np.random.default_rng(seed)
+    total_seconds = int((end - start).total_seconds())
+    offset = int((start - START).total_seconds())
+    n_background = int(round(n_events * (1 - branching_ratio())))
+    n_chunks = max(1, -(-n_events // chunk_events))
+
+    pending = None
+    next_id = 0
+    boundaries = np.linspace(0, total_seconds, n_chunks + 1).astype(np.int64) + offset
+    background_per_chunk = np.diff(np.linspace(0, n_background, n_chunks + 1).astype(np.int64))
+
+    for i in range(n_chunks):
+        chunk_start, chunk_end = boundaries[i], boundaries[i + 1]
+        n = background_per_chunk[i]
+
+        times = rng.integers(chunk_start, chunk_end, n)
+        lats, lons = _background_locations(rng, n)
+        events = [(times, lats, lons, _depths(rng, n), gutenberg_richter(rng, n))]
+        aftershocks = _cascade(rng, *events[0])
+        if aftershocks is not None:
+            events.append(aftershocks)
+        if pending is not None:
+            events.append(pending)
+        times, lats, lons, depths, mags = (np.concatenate(columns) for columns in zip(*events))
+
+        last = i == n_chunks - 1
+        emit = times < chunk_end if not last else times < boundaries[-1]
+        pending = None if last else tuple(column[~emit] for column in (times, lats, lons, depths, mags))
+
+        order = np.argsort(times[emit], kind='stable')
+        columns = [column[emit][order] for column in (times, lats, lons, depths, mags)]
+        frame = _to_frame(rng, *columns, first_id=next_id)
+        next_id += len(frame)
+        yield frame
+
+
+def generate_catalog(n_events, seed=42, **kwargs):
+    return pd.concat(list(iter_catalog(n_events, seed=seed, **kwargs)), ignore_index=True)
+
+
+def write_catalog(path, n_events, chunk_events=1_000_000, seed=42):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for i, frame in enumerate(iter_catalog(n_events, chunk_events=chunk_events, seed=seed)):
+        frame.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        written += len(frame)
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic catalog in the database.csv schema')
+    parser.add_argument('--events', type=int, required=True, help='Approximate number of events')
+    parser.add_argument('--out', type=Path, required=True)
+    parser.add_argument('--chunk-events', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    written = write_catalog(args.out, args.events, chunk_events=args.chunk_events, seed=args.seed)
+    seconds = time.perf_counter() - start
+    print(f"Wrote {written} events to {args.out} in {seconds:.1f} s ({written / seconds:,.0f} events/s)")
@@ -0,0 +1,307 @@
+import bisect
+import os
+import pickle
+import threading
+import time
+from collections import deque
+from pathlib import Path
+import numpy as np
+
+# Metrics rendered in the Prometheus text format. Recording is a dict lookup, a
+# bisect and a few additions under a per-series lock; quantiles and formatting
+# are only computed when /metrics is scraped.
+#
+# Under a preforking server each worker records into its own memory, and a scrape
+# lands on any one of them. With EQ_METRICS_DIR set, every process snapshots its
+# series to <dir>/<pid>.pkl (at most once per FLUSH_INTERVAL, off the request
+# path) and /metrics merges all snapshots, so the output describes the server as
+# a whole. Counters and histograms of exited workers keep counting towards the
+# totals; gauges only come from live processes.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+QUANTILES = (0.5, 0.95, 0.99)
+# Recent samples per series used for the quantile summaries
+RESERVOIR_SIZE = 2048
+# Seconds between snapshots of a process's series to EQ_METRICS_DIR
+FLUSH_INTERVAL = 1.0
+
+HISTOGRAMS = {
+    'http_request_duration_seconds': (LATENCY_BUCKETS, 'Request latency by endpoint'),
+    'model_forward_seconds': (LATENCY_BUCKETS, 'Model forward pass time'),
+    'model_batch_size': (BATCH_BUCKETS, 'Windows per model forward pass')
+}
+COUNTERS = {
+    'http_requests_total': 'Requests by endpoint and status code',
+    'cache_requests_total': 'Cache lookups by cache and result (hit or miss)'
+}
+GAUGES = {
+    'http_requests_in_flight': 'Requests currently being handled'
+}
+# How collector gauges from several processes combine; the default is 'sum'
+AGGREGATIONS = {
+    'sum': sum,
+    'max': max,
+    'min': min,
+    'mean': lambda values: sum(values) / len(values)
+}
+
+_START_TIME = time.time()
+_series = {}
+_series_lock = threading.Lock()
+_collectors = []
+_dirty = False
+_flusher_pid = None
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', 'recent', 'lock')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+            self.recent.append(value)
+
+
+class _Value:
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, amount):
+        with self.lock:
+            self.value += amount
+
+
+def _get(name, labels, factory):
+    global _dirty
+    _dirty = True
+    if _flusher_pid != os.getpid():
+        _start_flusher()
+    key = (name, tuple(sorted(labels.items())))
+    series = _series.get(key)
+    if series is None:
+        with _series_lock:
+            series = _series.setdefault(key, factory())
+    return series
+
+
+def observe(name, value, **labels):
+    _get(name, labels, lambda: _Histogram(HISTOGRAMS[name][0])).observe(value)
+
+
+def increment(name, amount=1, **labels):
+    _get(name, labels, _Value).add(amount)
+
+
+def add_gauge(name, amount, **labels):
+    _get(name, labels, _Value).add(amount)
+
+
+def register_collector(fn):
+    # fn() -> iterable of (name, labels, value, type, help[, aggregation]) read at
+    # snapshot time, for values that already live elsewhere (subscriber counts,
+    # rolling error). aggregation is a key of AGGREGATIONS, 'sum' by default.
+    _collectors.append(fn)
+    return fn
+
+
+def reset():
+    with _series_lock:
+        _series.clear()
+
+
+def metrics_dir():
+    path = os.environ.get('EQ_METRICS_DIR')
+    return Path(path) if path else None
+
+
+def _start_flusher():
+    # Threads do not survive fork, so each process starts its own on first use
+    global _flusher_pid
+    with _series_lock:
+        if _flusher_pid == os.getpid() or metrics_dir() is None:
+            _flusher_pid = os.getpid()
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_loop, name='telemetry-flush', daemon=True).start()
+
+
+def _flush_loop():
+    global _dirty
+    last = 0.0
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        # Collector gauges change without any recording, so flush now and then anyway
+        if _dirty or time.monotonic() - last > 10 * FLUSH_INTERVAL:
+            _dirty = False
+            try:
+                flush()
+            except Exception as e:
+                print(f"Error writing metrics snapshot: {e}")
+            last = time.monotonic()
+
+
+def flush():
+    # Atomically replaces this process's snapshot in EQ_METRICS_DIR
+    directory = metrics_dir()
+    if directory is None:
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'{os.getpid()}.pkl'
+    tmp = directory / f'.{os.getpid()}.pkl.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(_snapshot(), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _resident_memory_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _escape(value):
+    # Label values escape backslash, double quote and newline
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+def _snapshot():
+    # Plain-data copy of this process's series and collector gauges
+    series = {}
+    for key, s in list(_series.items()):
+        with s.lock:
+            if isinstance(s, _Histogram):
+                series[key] = ('histogram', s.buckets, list(s.counts), s.sum, s.count,
+                               np.fromiter(s.recent, np.float64))
+            else:
+                series[key] = ('value', s.value)
+
+    gauges = [
+        ('process_resident_memory_bytes', (), _resident_memory_bytes(), 'gauge', 'Resident set size', 'sum'),
+        ('process_start_time_seconds', (), _START_TIME, 'gauge', 'Process start time (unix seconds)', 'min')
+    ]
+    for collector in _collectors:
+        for entry in collector():
+            name, labels, value, kind, help_text = entry[:5]
+            aggregation = entry[5] if len(entry) > 5 else 'sum'
+            if value is not None:
+                gauges.append((name, tuple(sorted(labels.items())), value, kind, help_text, aggregation))
+    return {'series': series, 'gauges': gauges}
+
+
+def _snapshots():
+    # (snapshot, alive) for this process and, with EQ_METRICS_DIR, every other one
+    snapshots = [(_snapshot(), True)]
+    directory = metrics_dir()
+    if directory is None or not directory.exists():
+        return snapshots
+    for path in directory.glob('*.pkl'):
+        pid = int(path.stem)
+        if pid == os.getpid():
+            continue
+        try:
+            with open(path, 'rb') as f:
+                snapshots.append((pickle.load(f), _alive(pid)))
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            print(f"Skipping metrics snapshot {path.name}: {e}")
+    return snapshots
+
+
+def _merge(snapshots):
+    series, gauges = {}, {}
+    for snapshot, alive in snapshots:
+        for key, state in snapshot['series'].items():
+            # A gauge from an exited worker (e.g. requests in flight) is meaningless
+            if key[0] in GAUGES and not alive:
+                continue
+            merged = series.get(key)
+            if merged is None:
+                series[key] = [state[0], *state[1:]] if state[0] == 'value' else \
+                    ['histogram', state[1], list(state[2]), state[3], state[4], [state[5]]]
+            elif state[0] == 'value':
+                merged[1] += state[1]
+            else:
+                merged[2] = [a + b for a, b in zip(merged[2], state[2])]
+                merged[3] += state[3]
+                merged[4] += state[4]
+                merged[5].append(state[5])
+        if not alive:
+            continue
+        for name, labels, value, kind, help_text, aggregation in snapshot['gauges']:
+            entry = gauges.setdefault((name, labels), [kind, help_text, aggregation, []])
+            entry[3].append(value)
+    return series, gauges
+
+
+def render():
+    series, gauges = _merge(_snapshots())
+    by_name = {}
+    for (name, labels), state in series.items():
+        by_name.setdefault(name, []).append((labels, state))
+
+    lines = []
+    for name, entries in sorted(by_name.items()):
+        if name in HISTOGRAMS:
+            lines += [f'# HELP {name} {HISTOGRAMS[name][1]}', f'# TYPE {name} histogram']
+            summaries = []
+            for labels, (_, buckets, counts, total, count, recent) in entries:
+                cumulative = np.cumsum(counts)
+                for bound, c in zip(buckets, cumulative):
+                    lines.append(f'{name}_bucket{_labels(labels + (("le", bound),))} {c}')
+                lines.append(f'{name}_bucket{_labels(labels + (("le", "+Inf"),))} {count}')
+                lines.append(f'{name}_sum{_labels(labels)} {total}')
+                lines.append(f'{name}_count{_labels(labels)} {count}')
+                recent = np.concatenate(recent)
+                if len(recent):
+                    for q, v in zip(QUANTILES, np.quantile(recent, QUANTILES)):
+                        summaries.append(f'{name}_recent{_labels(labels + (("quantile", q),))} {v}')
+            # Exact quantiles over the last RESERVOIR_SIZE observations of each process
+            lines += [f'# HELP {name}_recent {HISTOGRAMS[name][1]} (recent samples)',
+                      f'# TYPE {name}_recent summary'] + summaries
+        else:
+            kind = 'counter' if name in COUNTERS else 'gauge'
+            lines += [f'# HELP {name} {COUNTERS.get(name) or GAUGES.get(name, name)}', f'# TYPE {name} {kind}']
+            lines += [f'{name}{_labels(labels)} {state[1]}' for labels, state in entries]
+
+    seen = set()
+    # Grouped by name: a metric family's samples must be contiguous
+    for (name, labels), (kind, help_text, aggregation, values) in sorted(gauges.items(), key=lambda item: item[0][0]):
+        if name not in seen:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            seen.add(name)
+        lines.append(f'{name}{_labels(labels)} {AGGREGATIONS[aggregation](values)}')
+
+    return '\n'.join(lines) + '\n'